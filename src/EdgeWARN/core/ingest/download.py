@@ -1,12 +1,93 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from lxml import etree, html
 import re
 import datetime
+import functools
 from urllib.parse import urljoin
-from util.io import IOManager
 from pathlib import Path
-import gzip
+import util.file as fs
+try:
+    from isal import igzip as gzip  # ISA-L SIMD inflate, drop-in for gzip.open
+except ImportError:
+    import gzip
 import shutil
 import os
+import threading
+import time
+
+HTTP_CHUNK_SIZE = 1024 * 1024  # 1 MiB per streamed chunk
+COPY_BUFFER_SIZE = 1024 * 1024  # 1 MiB per decompression read/write
+
+# Filename timestamp patterns, tried in order: '-' takes priority over '_', then GOES sYYYYDDDHHMMSSt.
+# (The MRMS 3D and _renamed names carry a single YYYYMMDD-HHMMSS stamp, so the '-' pattern covers them.)
+_TIMESTAMP_PATTERNS = [re.compile(p) for p in (
+    r'(\d{8})-(\d{6})',
+    r'(\d{8})_(\d{6})',
+    r"s(\d{4})(\d{3})(\d{2})(\d{2})(\d{2})(\d)"
+)]
+_DIGITS = frozenset("0123456789")
+
+# Shared HTTP session so listings and downloads reuse pooled keep-alive connections
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=16,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+))
+
+# Directory listing entries worth keeping (data suffix or embedded timestamp)
+_LISTING_FILE_RE = re.compile(r'\.(?:gz|grib2|nc|json)$|\d{8}-\d{6}')
+
+# Parsed directory listings keyed by URL: url -> (fetched_at, etag, last_modified, files)
+LISTING_CACHE_TTL = 30  # seconds before a cached listing is revalidated
+_LISTING_CACHE = {}
+_LISTING_CACHE_LOCK = threading.Lock()
+
+@functools.lru_cache(maxsize=4096)
+def _parse_filename_timestamp(filename):
+    """
+    Parse the timestamp embedded in a filename, rounded down to the minute.
+    Returns None when no pattern matches; results are memoized per filename.
+    """
+    # Names without any digit (README, catalog.html, ...) can't hold a timestamp; skip the regexes
+    if _DIGITS.isdisjoint(filename):
+        return None
+
+    for pattern in _TIMESTAMP_PATTERNS:
+        match = pattern.search(filename)
+        if not match:
+            continue
+        groups = match.groups()
+
+        try:
+            if len(groups) == 2:
+                date_str, time_str = groups
+            else:
+                year, doy, hour, minute, second, _ = groups
+                date_obj = datetime.datetime(int(year), 1, 1) + datetime.timedelta(days=int(doy) - 1)
+                date_str = date_obj.strftime('%Y%m%d')
+                time_str = hour + minute + second
+
+            # Create timezone-aware datetime object with full precision
+            dt_obj = datetime.datetime(
+                year=int(date_str[:4]),
+                month=int(date_str[4:6]),
+                day=int(date_str[6:8]),
+                hour=int(time_str[:2]),
+                minute=int(time_str[2:4]),
+                second=int(time_str[4:6]),
+                tzinfo=datetime.timezone.utc
+            )
+            # ROUND DOWN TO MINUTE PRECISION (truncate seconds/microseconds)
+            dt_obj = dt_obj.replace(second=0, microsecond=0)
+            return dt_obj
+        except (IndexError, ValueError):
+            # Unparseable match; try the next pattern
+            continue
+
+    return None
 
 class FileFinder:
     def __init__(self, dt, base_url, max_time, max_entries, io_manager):
@@ -22,83 +103,73 @@ class FileFinder:
         Extract timestamp from MRMS filename with multiple pattern support.
         Returns timezone-aware datetime object rounded DOWN to minute precision.
         """
-        patterns = [
-            r'MRMS_MergedReflectivityQC_3D_(\d{8})-(\d{6})',
-            r'(\d{8})-(\d{6})_renamed',
-            r'(\d{8})-(\d{6})',
-            r'(\d{8})_(\d{6})',
-            r'.*(\d{8})-(\d{6}).*',
-            r"s(\d{4})(\d{3})(\d{2})(\d{2})(\d{2})(\d)"
-        ]
-        
-        for pattern_idx, pattern in enumerate(patterns):
-            match = re.search(pattern, filename)
-            if match:
-                groups = match.groups()
-                
-                if len(groups) == 2:
-                    date_str, time_str = groups
-                elif len(groups) == 6:
-                    year, doy, hour, minute, second, _ = groups
-                    date_obj = datetime.datetime(int(year), 1, 1) + datetime.timedelta(days=int(doy) - 1)
-                    date_str = date_obj.strftime('%Y%m%d')
-                    time_str = hour + minute + second
-                else:
-                    combined = groups[0]
-                    if '-' in combined and len(combined) == 15:
-                        date_str, time_str = combined[:8], combined[9:]
-                    else:
-                        continue
-                
-                try:
-                    # Create timezone-aware datetime object with full precision
-                    dt_obj = datetime.datetime(
-                        year=int(date_str[:4]),
-                        month=int(date_str[4:6]),
-                        day=int(date_str[6:8]),
-                        hour=int(time_str[:2]),
-                        minute=int(time_str[2:4]),
-                        second=int(time_str[4:6]),
-                        tzinfo=datetime.timezone.utc
-                    )
-                    # ROUND DOWN TO MINUTE PRECISION (truncate seconds/microseconds)
-                    dt_obj = dt_obj.replace(second=0, microsecond=0)
-                    return dt_obj
-                except (IndexError, ValueError) as e:
-                    continue
-        
+        dt_obj = _parse_filename_timestamp(filename)
+        if dt_obj is not None:
+            return dt_obj
+
         # Return timezone-aware fallback rounded down to minute
         fallback = datetime.datetime.now(datetime.timezone.utc).replace(second=0, microsecond=0)
         return fallback
 
     def list_http_directory(self, url, verbose=True):
-        """List files in an HTTP directory by parsing HTML response."""
-        try:
-            response = requests.get(url)
-            response.raise_for_status()
-            
-            files = []
-            for line in response.text.split('\n'):
-                if 'href="' in line:
-                    match = re.search(r'href="([^"]+)"', line)
-                    if match:
-                        filename = match.group(1)
-                        if (filename.endswith('/') or 
-                            '?' in filename or 
-                            '=' in filename or 
-                            'latest' in filename.lower() or
-                            filename in ['../', 'Parent Directory/'] or
-                            filename.startswith('?')):
-                            continue
-                        if (filename.endswith('.gz') or 
-                            filename.endswith('.grib2') or 
-                            filename.endswith('.nc') or
-                            filename.endswith('.json') or
-                            re.search(r'\d{8}-\d{6}', filename)):
-                            files.append(filename)
+        """
+        List files in an HTTP directory by parsing HTML response.
+        Parsed listings are cached per URL for LISTING_CACHE_TTL seconds, then
+        revalidated with a conditional GET (ETag / Last-Modified).
+        """
+        with _LISTING_CACHE_LOCK:
+            cached = _LISTING_CACHE.get(url)
+
+        if cached and time.monotonic() - cached[0] < LISTING_CACHE_TTL:
             if verbose:
-                self.io_manager.write_debug(f"Found {len(files)} potential files to process in {url}")
-            return files
+                self.io_manager.write_debug(f"Using cached listing ({len(cached[3])} files) for {url}")
+            return list(cached[3])
+
+        headers = {}
+        if cached:
+            if cached[1]:
+                headers["If-None-Match"] = cached[1]
+            if cached[2]:
+                headers["If-Modified-Since"] = cached[2]
+
+        try:
+            response = _SESSION.get(url, headers=headers)
+
+            if response.status_code == 304 and cached:
+                files = cached[3]
+                if verbose:
+                    self.io_manager.write_debug(f"Listing not modified ({len(files)} files) for {url}")
+            else:
+                response.raise_for_status()
+
+                # Pull every anchor href in one libxml2 pass over the raw bytes
+                # (response.text would push the whole page through Python's decoder first)
+                # A blank or comment-only body has no document to parse; treat it as an empty listing
+                try:
+                    hrefs = html.fromstring(response.content).xpath('//a/@href')
+                except (etree.ParserError, ValueError):
+                    hrefs = []
+
+                files = []
+                for filename in hrefs:
+                    if (filename.endswith('/') or
+                        '?' in filename or
+                        '=' in filename or
+                        'latest' in filename.lower()):
+                        continue
+                    if _LISTING_FILE_RE.search(filename):
+                        files.append(filename)
+                if verbose:
+                    self.io_manager.write_debug(f"Found {len(files)} potential files to process in {url}")
+
+            with _LISTING_CACHE_LOCK:
+                _LISTING_CACHE[url] = (
+                    time.monotonic(),
+                    response.headers.get("ETag", cached[1] if cached else None),
+                    response.headers.get("Last-Modified", cached[2] if cached else None),
+                    files
+                )
+            return list(files)
             
         except requests.RequestException as e:
             print(f"[DataIngestion] ERROR: Could not access {url}: {e}")
@@ -133,8 +204,6 @@ class FileFinder:
         files = self.list_http_directory(full_url, verbose=verbose)
         
         for filename in files:
-            if 'latest' in filename.lower():
-                continue
             timestamp = self.extract_timestamp_from_filename(filename)
             if timestamp.tzinfo is None:
                 timestamp = timestamp.replace(tzinfo=datetime.timezone.utc)
@@ -179,7 +248,7 @@ class FileDownloader:
             matched = [latest_file]
 
         # Take first match
-        latest, ts = matched[0]
+        latest, _ = matched[0]
         self.io_manager.write_debug(f"Selected file: {latest}")
 
         # Ensure output directory exists
@@ -189,23 +258,26 @@ class FileDownloader:
         filename = Path(latest).name
         outfile = outdir / filename
 
-        # Skip if already downloaded
-        if outfile.exists():
+        # Skip if already downloaded (empty files are fetched again)
+        st = fs.stat_or_none(outfile)
+        if st is not None and st.st_size > 0:
             self.io_manager.write_debug(f"{outfile} already exists locally")
             return outfile
 
-        # Download file
+        # Download into a .part file and rename on success, so a partial file is never mistaken for a finished one
+        partfile = outfile.with_suffix(outfile.suffix + ".part")
         try:
             self.io_manager.write_debug(f"Downloading file: {filename}")
-            response = requests.get(latest, stream=True, timeout=30)
+            response = _SESSION.get(latest, stream=True, timeout=30)
             response.raise_for_status()
-            with open(outfile, "wb") as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
+            response.raw.decode_content = True
+            with open(partfile, "wb") as f:
+                shutil.copyfileobj(response.raw, f, length=HTTP_CHUNK_SIZE)
+            os.replace(partfile, outfile)
             self.io_manager.write_debug(f"Downloaded file successfully -> {outfile}")
             return outfile
         except Exception as e:
+            partfile.unlink(missing_ok=True)
             self.io_manager.write_error(f"Failed to download {filename}: {e}")
             return None
     
@@ -231,7 +303,7 @@ class FileDownloader:
             raise ValueError(f"[DataIngestion] ERROR: Invalid index {n}. Must be between 0 and {len(files) - 1}")
         
         # Get the nth file
-        file_url, timestamp = files[n]
+        file_url, _ = files[n]
         
         # Ensure output directory exists
         outdir.mkdir(parents=True, exist_ok=True)
@@ -240,12 +312,18 @@ class FileDownloader:
         filename = Path(file_url).name
         outfile = outdir / filename
 
-        # Download the file
-        response = requests.get(file_url, stream=True)
-        response.raise_for_status()
-        with open(outfile, "wb") as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
+        # Download the file via a .part file, renamed into place on success
+        partfile = outfile.with_suffix(outfile.suffix + ".part")
+        try:
+            response = _SESSION.get(file_url, stream=True)
+            response.raise_for_status()
+            response.raw.decode_content = True
+            with open(partfile, "wb") as f:
+                shutil.copyfileobj(response.raw, f, length=HTTP_CHUNK_SIZE)
+            os.replace(partfile, outfile)
+        except Exception:
+            partfile.unlink(missing_ok=True)
+            raise
 
         return outfile
     
@@ -257,19 +335,22 @@ class FileDownloader:
         and delete the timestamp folder.
         - If the file is directly inside the dataset dir, just decompress in place.
         """
-        if not gz_path.exists():
-            self.io_manager.write_error(f"File does not exist: {gz_path}")
-            return None
-
         if gz_path.suffix != ".gz":
             self.io_manager.write_warning(f"Not a .gz file: {gz_path}")
             return None
 
+        # Open directly instead of checking exists() first; a missing file shows up here
+        try:
+            f_in = gzip.open(gz_path, "rb")
+        except FileNotFoundError:
+            self.io_manager.write_error(f"File does not exist: {gz_path}")
+            return None
+
         try:
             # Decompress
             grib_path = gz_path.with_suffix("")  # remove .gz
-            with gzip.open(gz_path, "rb") as f_in, open(grib_path, "wb") as f_out:
-                shutil.copyfileobj(f_in, f_out)
+            with f_in, open(grib_path, "wb") as f_out:
+                shutil.copyfileobj(f_in, f_out, length=COPY_BUFFER_SIZE)
 
             self.io_manager.write_debug(f"Decompressed: {grib_path}")
 
@@ -10,7 +10,12 @@ import util.file as fs
 
 io_manager = IOManager("[DataIngestion]")
 
-def process_modifier(modifier, outdir, dt, max_time, max_entries):
+def process_modifier(modifier, outdir, dt, max_time, max_entries, files_with_timestamps=None):
+    """
+    Look up, download and decompress the latest file for one MRMS source.
+    files_with_timestamps: optional (url, timestamp) listing already fetched for this
+    modifier with the same dt/max_time/max_entries; skips the directory lookup.
+    """
     io_manager.write_debug(f"Checking MRMS source: {modifier}")
     
     # Ensure dt has minute precision (ignore seconds)
@@ -20,7 +25,8 @@ def process_modifier(modifier, outdir, dt, max_time, max_entries):
     downloader = FileDownloader(dt_minute_precision, io_manager)
 
     try:
-        files_with_timestamps = finder.lookup_files(modifier)
+        if files_with_timestamps is None:
+            files_with_timestamps = finder.lookup_files(modifier)
         if not files_with_timestamps:
             io_manager.write_warning(f"No files found for {modifier} at exact minute {dt_minute_precision}")
             return
@@ -39,20 +45,28 @@ def process_modifier(modifier, outdir, dt, max_time, max_entries):
     except Exception as e:
         io_manager.write_error(f"Failed to process {modifier} - {e}")
     
-def download_all_files(dt):
-    # Clear Files
+def download_all_files(dt, prefetched_listings=None):
+    """
+    Download every MRMS source for dt.
+    prefetched_listings: optional {modifier: [(url, timestamp), ...]} from lookup_files calls
+    made with the same 6 h / 10 entry limits; those modifiers skip their directory lookup.
+    """
+    prefetched_listings = prefetched_listings or {}
+
+    # Clear Files (all folders and the temp dir in one concurrent pass)
     folders = [modifier[1] for modifier in mrms_modifiers]
-    for f in folders:
-        fs.clean_old_files(f, max_age_minutes=20)
-    fs.wipe_temp()
+    fs.clean_multiple(folders, max_age_minutes=20)
+    fs.clean_old_files(fs.DETECT_CACHE_DIR, max_age_minutes=60)
 
     max_time = datetime.timedelta(hours=6)   # Look back 6 hours
     max_entries = 10                         # How many files to check per source
 
-    # Multithread MRMS downloads
-    with ThreadPoolExecutor(max_workers=len(mrms_modifiers) + 2) as executor:
+    # Multithread MRMS downloads: one worker per source, so every listing, download and
+    # decompression overlaps (socket reads and zlib inflate both release the GIL)
+    with ThreadPoolExecutor(max_workers=len(mrms_modifiers)) as executor:
         futures = [
-            executor.submit(process_modifier, modifier, outdir, dt, max_time, max_entries)
+            executor.submit(process_modifier, modifier, outdir, dt, max_time, max_entries,
+                            prefetched_listings.get(modifier))
             for modifier, outdir in mrms_modifiers
         ]
 
@@ -79,19 +93,24 @@ if __name__ == "__main__":
         if latest_common_minute != last_processed:
             print(f"[Scheduler] DEBUG: New latest common timestamp found: {latest_common_minute}")
             
-            # Verify that ALL modifiers have files at this exact minute
+            # Verify that ALL modifiers have files at this exact minute (listings fetched concurrently)
             all_have_files = True
-            for modifier, outdir in check_modifiers:
-                dt_minute_precision = latest_common_minute.replace(second=0, microsecond=0)
-                finder = FileFinder(dt_minute_precision, base_dir, datetime.timedelta(hours=6), 10, io_manager)
-                files = finder.lookup_files(modifier, verbose=False)
-                if not files:
-                    print(f"[Scheduler] WARNING: {modifier} has no files at {latest_common_minute}")
-                    all_have_files = False
+            listings = {}
+            finder = FileFinder(latest_common_minute, base_dir, datetime.timedelta(hours=6), 10, io_manager)
+            with ThreadPoolExecutor(max_workers=len(check_modifiers)) as executor:
+                futures = {
+                    executor.submit(finder.lookup_files, modifier, verbose=False): modifier
+                    for modifier, _ in check_modifiers
+                }
+                for future in as_completed(futures):
+                    listings[futures[future]] = future.result()
+                    if not listings[futures[future]]:
+                        print(f"[Scheduler] WARNING: {futures[future]} has no files at {latest_common_minute}")
+                        all_have_files = False
             
             if all_have_files:
                 dt = latest_common_minute
-                download_all_files(dt)
+                download_all_files(dt, prefetched_listings=listings)
                 last_processed = latest_common_minute
             else:
                 print(f"[Scheduler] Not all products have files at {latest_common_minute}. Skipping...")
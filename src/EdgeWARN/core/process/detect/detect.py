@@ -2,8 +2,38 @@ from EdgeWARN.core.process.detect.tools.utils import DetectionDataHandler
 from EdgeWARN.core.process.detect.tools.gatemapper import GateMapper
 from EdgeWARN.core.process.detect.tools.save import CellDataSaver
 import util.file as fs
+import hashlib
+import os
+
+def _detect_cache_path(radar_path, ps_path, preciptype_path, lat_min, lat_max, lon_min, lon_max):
+    """
+    Cache file for a detection run, keyed by the input paths, their mtimes and the bounds
+    """
+    key = repr((
+        str(radar_path), str(ps_path), str(preciptype_path),
+        lat_min, lat_max, lon_min, lon_max,
+        os.path.getmtime(radar_path), os.path.getmtime(ps_path), os.path.getmtime(preciptype_path)
+    ))
+    digest = hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+    return fs.DETECT_CACHE_DIR / f"{digest}.json"
 
 def detect_cells(radar_path, ps_path, preciptype_path, io_manager, lat_min, lat_max, lon_min, lon_max):
+    try:
+        cache_path = _detect_cache_path(radar_path, ps_path, preciptype_path, lat_min, lat_max, lon_min, lon_max)
+    except OSError as e:
+        io_manager.write_warning(f"Detection cache disabled for {radar_path}: {e}")
+        cache_path = None
+
+    if cache_path is not None:
+        try:
+            cached = fs.read_json(cache_path)
+            io_manager.write_debug(f"Loaded cached detection results from {cache_path}")
+            return cached["entries"], cached["probsevere"]
+        except FileNotFoundError:
+            pass
+        except (ValueError, KeyError) as e:
+            io_manager.write_warning(f"Ignoring unreadable detection cache {cache_path}: {e}")
+
     handler = DetectionDataHandler(
         radar_path,
         ps_path, preciptype_path,
@@ -27,11 +57,19 @@ def detect_cells(radar_path, ps_path, preciptype_path, io_manager, lat_min, lat_
         expanded_ds, ps_ds, preciptype_ds
     )
 
-    saver.create_entry()
     entries = saver.create_entry()
     entries = saver.append_storm_history(entries, radar_path)
 
-    return entries
+    # Old cache files are removed by the ingest cleanup pass (download_all_files)
+    if cache_path is not None:
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            fs.write_json({"entries": entries, "probsevere": ps_ds}, cache_path, indent=None)
+        except (OSError, TypeError, ValueError) as e:
+            io_manager.write_warning(f"Failed to write detection cache {cache_path}: {e}")
+
+    # ProbSevere data is returned too so callers don't have to reload it
+    return entries, ps_ds
 
 if __name__ == "__main__":
     radar_path = fs.latest_files(fs.MRMS_COMPOSITE_DIR, 1)[-1]
@@ -5,7 +5,6 @@ from EdgeWARN.core.process.detect.track import StormCellTracker
 from EdgeWARN.core.process.detect.detect import detect_cells
 from util.io import IOManager
 import util.file as fs
-import json as js
 
 io_manager = IOManager("[CellDetection]")
 
@@ -19,18 +18,19 @@ def main(radar_old, radar_new, ps_old, ps_new, pt_old, pt_new, lat_bounds: tuple
         io_manager.write_debug("No new scan specified — running single-frame detection mode")
 
     # === Load or create previous entries ===
-    if json_output.exists() and json_output.stat().st_size > 0:
+    ps_old_ds = None  # Filled when the old scan is redetected
+    json_stat = fs.stat_or_none(json_output)
+    if json_stat is not None and json_stat.st_size > 0:
         try:
-            with open(json_output, 'r') as f:
-                entries_old = js.load(f)
+            entries_old = fs.read_json(json_output)
             io_manager.write_debug(f"Loaded {len(entries_old)} cells from {json_output}")
-        except (js.JSONDecodeError, KeyError, IndexError) as e:
+        except (ValueError, KeyError, IndexError) as e:
             io_manager.write_error(f"Failed to load existing data: {e}. Redetecting from old scan ...")
-            entries_old = detect_cells(radar_old, ps_old, pt_old, io_manager, lat_min, lat_max, lon_min, lon_max)
+            entries_old, ps_old_ds = detect_cells(radar_old, ps_old, pt_old, io_manager, lat_min, lat_max, lon_min, lon_max)
             io_manager.write_debug(f"Detected {len(entries_old)} cells in old scan.")
     else:
         io_manager.write_debug("JSON output doesn't exist, detecting from old scan ...")
-        entries_old = detect_cells(radar_old, ps_old, pt_old, io_manager, lat_min, lat_max, lon_min, lon_max)
+        entries_old, ps_old_ds = detect_cells(radar_old, ps_old, pt_old, io_manager, lat_min, lat_max, lon_min, lon_max)
         io_manager.write_debug(f"Detected {len(entries_old)} cells in old scan.")
 
     # === If single-frame mode, just update/save ===
@@ -39,27 +39,25 @@ def main(radar_old, radar_new, ps_old, ps_new, pt_old, pt_new, lat_bounds: tuple
         saver = CellDataSaver(None, radar_old, None, None, ps_old, None)
         entries = saver.append_storm_history(entries_old, radar_old)
         entries = StormVectorCalculator.calculate_vectors(entries)
-        with open(json_output, 'w') as f:
-            js.dump(entries, f, indent=2, default=str)
+        fs.write_json(entries, json_output)
         return
 
     # === Dual-frame mode ===
     io_manager.write_debug("Detecting cells in new scan ...")
-    entries_new = detect_cells(radar_new, ps_new, pt_new, io_manager, lat_min, lat_max, lon_min, lon_max)
+    entries_new, ps_new = detect_cells(radar_new, ps_new, pt_new, io_manager, lat_min, lat_max, lon_min, lon_max)
     io_manager.write_debug(f"Detected {len(entries_new)} cells in new scan")
 
     io_manager.write_debug("Matching and updating cell data")
-    ps_old = DetectionDataHandler(radar_old, ps_old, pt_old, io_manager, lat_min, lat_max, lon_min, lon_max).load_probsevere()
-    ps_new = DetectionDataHandler(radar_new, ps_new, pt_new, io_manager, lat_min, lat_max, lon_min, lon_max).load_probsevere()
+    if ps_old_ds is None:
+        ps_old_ds = DetectionDataHandler(radar_old, ps_old, pt_old, io_manager, lat_min, lat_max, lon_min, lon_max).load_probsevere()
     
-    tracker = StormCellTracker(ps_old, ps_new, io_manager)
+    tracker = StormCellTracker(ps_old_ds, ps_new, io_manager)
     saver = CellDataSaver(None, radar_new, None, None, ps_new, None)
     entries = tracker.update_cells(entries_old, entries_new)
     entries = saver.append_storm_history(entries, radar_new)
     entries = StormVectorCalculator.calculate_vectors(entries)
 
-    with open(json_output, 'w') as f:
-        js.dump(entries, f, indent=2, default=str)
+    fs.write_json(entries, json_output)
 
 if __name__ == "__main__":
     from pathlib import Path
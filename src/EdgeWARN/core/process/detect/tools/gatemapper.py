@@ -1,7 +1,8 @@
-from shapely.geometry import Point, shape
+import shapely
+from shapely.geometry import shape
 import numpy as np
 import xarray as xr
-from scipy.ndimage import binary_dilation
+from scipy import ndimage
 from skimage import measure
 
 class GateMapper:
@@ -20,48 +21,53 @@ class GateMapper:
         lats = self.radar_ds['latitude'].values
         lons = self.radar_ds['longitude'].values
 
-        # Create meshgrid for radar gates
-        lat_grid, lon_grid = np.meshgrid(lats, lons, indexing='ij')
-        polygon_grid = np.zeros_like(lat_grid, dtype=int)
+        # Polygon ID per radar gate (rows follow latitude, columns longitude)
+        polygon_grid = np.zeros((lats.size, lons.size), dtype=int)
 
         # Convert ProbSevere longitudes to 0-360
         for feature in self.ps_ds.get('features', []):
-            for ring in feature['geometry']['coordinates']:
-                for i, (lon, lat) in enumerate(ring):
-                    if lon < 0:
-                        ring[i] = (lon + 360, lat)
+            rings = feature['geometry']['coordinates']
+            for k, ring in enumerate(rings):
+                ring = np.asarray(ring, dtype=np.float64)
+                np.add(ring[:, 0], 360.0, out=ring[:, 0], where=ring[:, 0] < 0)
+                rings[k] = ring.tolist()
 
         # Loop over each polygon in ProbSevere data
         for feature in self.ps_ds.get('features', []):
             poly_id = int(feature['properties'].get('ID', 0))
             polygon = shape(feature['geometry'])
 
-            # Assign polygon ID to all gates inside this polygon
-            for i in range(lat_grid.shape[0]):
-                for j in range(lat_grid.shape[1]):
-                    if polygon_grid[i, j] == 0:  # only assign if empty
-                        point = Point(lon_grid[i, j], lat_grid[i, j])
-                        if polygon.contains(point):
-                            polygon_grid[i, j] = poly_id
+            # Only test gates inside the polygon's bounding box (a view into polygon_grid)
+            minx, miny, maxx, maxy = polygon.bounds
+            rows = np.flatnonzero((lats >= miny) & (lats <= maxy))
+            cols = np.flatnonzero((lons >= minx) & (lons <= maxx))
+            if rows.size == 0 or cols.size == 0:
+                continue
+            block = polygon_grid[rows[0]:rows[-1] + 1, cols[0]:cols[-1] + 1]
+            block_lats = lats[rows[0]:rows[-1] + 1]
+            block_lons = lons[cols[0]:cols[-1] + 1]
+
+            # Bulk point-in-polygon test on still-empty gates (same strict-interior rule as polygon.contains)
+            candidates = block == 0
+            block_rows, block_cols = np.nonzero(candidates)
+            candidates[candidates] = shapely.contains_xy(polygon, block_lons[block_cols], block_lats[block_rows])
+
+            # Claim empty gates only; earlier polygons keep theirs
+            np.putmask(block, candidates, poly_id)
 
         # Return as xarray.Dataset
-        return xr.Dataset(
-            {
-                'PolygonID': (('latitude', 'longitude'), polygon_grid)
-            },
-            coords={
-                'latitude': lats,
-                'longitude': lons
-            }
-        )
+        return self._polygon_dataset(polygon_grid, lats, lons)
 
     def expand_gates(self, mapped_ds, max_iterations=100):
         """
-        Vectorized expansion of ProbSevere polygons, preserving the rule that
+        Frontier-based expansion of ProbSevere polygons, preserving the rule that
         once a gate is assigned to a polygon, it cannot be claimed by another.
 
         Each iteration expands all polygons simultaneously into neighboring
-        reflectivity-qualified gates (4-connected neighborhood).
+        reflectivity-qualified gates (4-connected neighborhood). Only the gates
+        claimed in the previous iteration are visited, so the work is proportional
+        to the number of qualified gates rather than iterations x raster size.
+        Where polygons meet, the gate goes to the largest neighbouring ID.
 
         Parameters:
             mapped_ds (xarray.Dataset): Dataset from map_gates_to_polygons()
@@ -73,53 +79,78 @@ class GateMapper:
         if self.refl_threshold is None:
             raise ValueError("self.refl_threshold must be set to expand polygons.")
 
-        # Base data
-        polygon_grid = mapped_ds['PolygonID'].values.copy()
+        # Base data, padded by one gate so neighbour lookups never leave the grid
+        polygon_grid = np.pad(mapped_ds['PolygonID'].values, 1)
         refl_grid = self.radar_ds['unknown'].values  # <-- replace 'unknown' with actual variable name
-        mask = refl_grid >= self.refl_threshold
+        mask = np.pad(refl_grid >= self.refl_threshold, 1, constant_values=False)
 
-        # 4-connected structure for expansion
-        structure = np.array([[0,1,0],
-                            [1,1,1],
-                            [0,1,0]], dtype=bool)
+        # 4-connected neighbour offsets in the flattened padded grid
+        width = polygon_grid.shape[1]
+        offsets = np.array([-width, -1, 1, width])
+        flat_grid = polygon_grid.reshape(-1)
+        flat_mask = mask.reshape(-1)
 
-        for iteration in range(max_iterations):
-            # Identify which cells belong to any polygon
-            occupied = polygon_grid > 0
+        # Start from every assigned gate; afterwards only the newly claimed ones
+        frontier = np.flatnonzero(flat_grid)
+        slot = np.empty(flat_grid.size, dtype=np.intp)  # scratch for de-duplicating the frontier
 
-            # Binary dilation of the occupied mask (potential expansion front)
-            expanded = binary_dilation(occupied, structure=structure)
+        # Unassigned, above-threshold gates; cleared in place as gates are claimed
+        claimable = flat_grid == 0
+        np.logical_and(claimable, flat_mask, out=claimable)
 
-            # Candidates: cells that are unassigned, above threshold, and adjacent to polygons
-            candidates = expanded & (~occupied) & mask
+        for iteration in range(max_iterations):
+            # Claimable neighbours of the frontier
+            neighbours = np.add(frontier[:, None], offsets).ravel()
+            kept = np.flatnonzero(claimable[neighbours])
 
-            if not np.any(candidates):
+            if kept.size == 0:
                 print(f"[CellDetection] Completed expansion in {iteration} iterations (vectorized, non-overwriting)")
                 break
 
-            # Find all polygon IDs to expand
-            unique_ids = np.unique(polygon_grid[occupied])
-            new_assignments = np.zeros_like(polygon_grid)
+            neighbours = neighbours[kept]
+            ids = flat_grid[frontier[kept // len(offsets)]]
 
-            # For each polygon, expand only into its own adjacent area (vectorized per ID)
-            for poly_id in unique_ids:
-                poly_mask = polygon_grid == poly_id
-                expanded_poly = binary_dilation(poly_mask, structure=structure)
-                new_pixels = expanded_poly & candidates & (polygon_grid == 0)
-                new_assignments[new_pixels] = poly_id
+            # Apply new assignments (largest neighbouring ID) — once a cell is filled, it never changes
+            np.maximum.at(flat_grid, neighbours, ids)
+            claimable[neighbours] = False
 
-            # Apply new assignments — once a cell is filled, it never changes
-            polygon_grid[new_assignments > 0] = new_assignments[new_assignments > 0]
+            # De-duplicate without sorting: keep the last occurrence of each gate
+            positions = np.arange(neighbours.size)
+            slot[neighbours] = positions
+            frontier = neighbours[slot[neighbours] == positions]
 
         else:
             print(f"[CellDetection] Reached max_iterations ({max_iterations}) without convergence")
 
+        polygon_grid = polygon_grid[1:-1, 1:-1]
+
         # Return as xarray dataset
+        return self._polygon_dataset(polygon_grid, mapped_ds['latitude'].values, mapped_ds['longitude'].values)
+
+    @staticmethod
+    def _polygon_dataset(polygon_grid, lats, lons):
+        """
+        Wrap a PolygonID grid as an xarray.Dataset, along with flat gate indices
+        bucketed by polygon ID (one stable sort) so consumers don't re-derive them:
+            gate_order:   flat gate indices sorted by ID (row-major within each ID)
+            bucket_id:    sorted unique IDs (including background 0)
+            bucket_start: offset of each ID's bucket in gate_order
+        """
+        polygon_grid = np.ascontiguousarray(polygon_grid)
+        flat = polygon_grid.ravel()
+        order = np.argsort(flat, kind='stable')
+        ids, starts = np.unique(flat[order], return_index=True)
+
         return xr.Dataset(
-            {'PolygonID': (('latitude', 'longitude'), polygon_grid)},
+            {
+                'PolygonID': (('latitude', 'longitude'), polygon_grid),
+                'gate_order': (('gate',), order),
+                'bucket_id': (('bucket',), ids),
+                'bucket_start': (('bucket',), starts)
+            },
             coords={
-                'latitude': mapped_ds['latitude'].values,
-                'longitude': mapped_ds['longitude'].values
+                'latitude': lats,
+                'longitude': lons
             }
         )
     
@@ -139,23 +170,30 @@ class GateMapper:
         lats = expanded_ds['latitude'].values
         lons = expanded_ds['longitude'].values
 
-        unique_ids = np.unique(polygon_grid)
+        unique_ids = expanded_ds['bucket_id'].values
         unique_ids = unique_ids[unique_ids != 0]  # skip background
 
+        # Relabel IDs to 1..N so find_objects can return each polygon's bounding slices
+        labels = np.zeros(polygon_grid.shape, dtype=np.int32)
+        occupied = polygon_grid != 0
+        labels[occupied] = np.searchsorted(unique_ids, polygon_grid[occupied]) + 1
+        slices = ndimage.find_objects(labels)
+
         bboxes = {}
 
-        for poly_id in unique_ids:
-            mask = polygon_grid == poly_id
-            if not np.any(mask):
-                continue
+        for poly_id, (row_slice, col_slice) in zip(unique_ids, slices):
+            # Crop to the polygon's bounding box plus a one-gate border
+            r0 = max(row_slice.start - 1, 0)
+            c0 = max(col_slice.start - 1, 0)
+            mask = polygon_grid[r0:row_slice.stop + 1, c0:col_slice.stop + 1] == poly_id
 
             # Find contours at the 0.5 level (between 0 and 1)
-            contours = measure.find_contours(mask.astype(float), 0.5)
+            contours = measure.find_contours(mask.view(np.uint8), 0.5)
             if not contours:
                 continue
 
-            # Take the longest contour (usually the exterior)
-            contour = max(contours, key=len)
+            # Take the longest contour (usually the exterior), back in full-grid indices
+            contour = max(contours, key=len) + (r0, c0)
 
             # Downsample every 'step' points
             contour = contour[::step]
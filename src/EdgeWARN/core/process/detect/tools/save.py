@@ -1,4 +1,6 @@
+from functools import cached_property
 import numpy as np
+from scipy import ndimage
 from skimage import measure
 from EdgeWARN.core.process.detect.tools.utils import DetectionDataHandler
 
@@ -10,6 +12,44 @@ class CellDataSaver:
         self.expanded_ds = expanded_ds
         self.ps_ds = ps_ds
         self.preciptype_ds = preciptype_ds
+        self._gate_indices = {}  # grid name -> {poly_id: flat gate indices}
+
+    # Raw arrays, pulled out of the datasets once on first use. Kept lazy because
+    # the saver is also built with only radar/ProbSevere data for append_storm_history.
+    @cached_property
+    def _mapped_grid(self):
+        return self.mapped_ds['PolygonID'].values
+
+    @cached_property
+    def _refl(self):
+        return self.radar_ds['unknown'].values
+
+    @cached_property
+    def _precip(self):
+        return self.preciptype_ds['unknown'].values
+
+    @cached_property
+    def _lats(self):
+        return self.radar_ds['latitude'].values
+
+    @cached_property
+    def _lons(self):
+        return self.radar_ds['longitude'].values
+
+    def __polygon_gate_indices(self, name, dataset):
+        """
+        Per-ID flat gate indices of a PolygonID dataset, sliced from the sorted
+        buckets GateMapper stores alongside the grid. Cached per grid name.
+        """
+        if name not in self._gate_indices:
+            order = dataset['gate_order'].values
+            ids = dataset['bucket_id'].values
+            starts = dataset['bucket_start'].values
+            ends = np.append(starts[1:], order.size)
+            self._gate_indices[name] = {
+                poly_id: order[start:end] for poly_id, start, end in zip(ids.tolist(), starts, ends)
+            }
+        return self._gate_indices[name]
 
     def __create_hailcore_polygon(self, poly_id, step=5):
         """
@@ -17,38 +57,40 @@ class CellDataSaver:
         cells (preciptype == 7) within a ProbSevere polygon.
         Returns a list of (lat, lon) points sampled every 'step' along the contour.
         """
-        # Polygon mask
-        polygon_grid = self.expanded_ds['PolygonID'].values
-        poly_mask = polygon_grid == poly_id
-        if not np.any(poly_mask):
+        # Gates of this polygon in the expanded grid
+        gate_idx = self.__polygon_gate_indices('expanded', self.expanded_ds).get(poly_id)
+        if gate_idx is None or gate_idx.size == 0:
             return []
 
         # Hail mask (preciptype == 7) inside polygon
-        precip_grid = self.preciptype_ds['unknown'].values
-        hail_mask = (precip_grid == 7) & poly_mask
-        if not np.any(hail_mask):
+        precip_grid = self._precip
+        hail_idx = gate_idx[precip_grid.ravel()[gate_idx] == 7]
+        if hail_idx.size == 0:
             return []
 
-        # Latitude and longitude grids
-        lat_grid = self.radar_ds['latitude'].values
-        lon_grid = self.radar_ds['longitude'].values
-        if lat_grid.ndim == 1 and lon_grid.ndim == 1:
-            lat_grid, lon_grid = np.meshgrid(lat_grid, lon_grid, indexing='ij')
+        # Build the mask only over the hail gates' bounding box plus a one-gate border
+        rows, cols = np.unravel_index(hail_idx, precip_grid.shape)
+        r0 = max(rows.min() - 1, 0)
+        c0 = max(cols.min() - 1, 0)
+        r1 = min(rows.max() + 2, precip_grid.shape[0])
+        c1 = min(cols.max() + 2, precip_grid.shape[1])
+        hail_mask = np.zeros((r1 - r0, c1 - c0), dtype=bool)
+        hail_mask[rows - r0, cols - c0] = True
 
         # Find contours on the hail mask
-        contours = measure.find_contours(hail_mask.astype(float), 0.5)
+        contours = measure.find_contours(hail_mask.view(np.uint8), 0.5)
         if not contours:
             return []
 
-        # Take the largest contour (most points)
-        contour = max(contours, key=lambda c: c.shape[0])
+        # Take the largest contour (most points), back in full-grid indices
+        contour = max(contours, key=lambda c: c.shape[0]) + (r0, c0)
 
         # Sample every 'step' points
         sampled = contour[::step]
 
         # Convert indices to lat/lon and return as list of tuples
         polygon_points = [
-            (float(lat_grid[int(r), int(c)]), float(lon_grid[int(r), int(c)] % 360))
+            (float(self._lats[int(r)]), float(self._lons[int(c)] % 360))
             for r, c in sampled
         ]
 
@@ -60,17 +102,38 @@ class CellDataSaver:
         to each ProbSevere cell entry using exponential weighting.
         Returns a list of dictionaries with properties.
         """
-        # Polygon and reflectivity grids (aligned 2D arrays)
-        polygon_grid = self.mapped_ds['PolygonID'].values
-        refl_grid = self.radar_ds['unknown'].values
-
-        # Get matching latitude and longitude grids
-        lat_grid = self.radar_ds['latitude'].values
-        lon_grid = self.radar_ds['longitude'].values
-
-        # Ensure lat/lon are 2D
-        if lat_grid.ndim == 1 and lon_grid.ndim == 1:
-            lat_grid, lon_grid = np.meshgrid(lat_grid, lon_grid, indexing='ij')
+        # Gate indices per polygon and reflectivity grid (aligned with PolygonID)
+        polygon_grid = self._mapped_grid
+        gate_indices = self.__polygon_gate_indices('mapped', self.mapped_ds)
+        refl_grid = self._refl
+
+        # Matching 1D latitude and longitude coordinates (row -> lat, column -> lon)
+        lats = self._lats
+        lons = self._lons
+
+        # Per-polygon reductions, one labeled C call each.
+        # Labels only cover gates with valid reflectivity.
+        ids = np.unique([poly_id for poly_id in self.bboxes if poly_id != 0])
+        if ids.size == 0:
+            return []
+        labels = np.where(~np.isnan(refl_grid) & np.isin(polygon_grid, ids), polygon_grid, 0)
+        labeled = labels != 0
+        valid_counts = ndimage.sum_labels(labeled, labels, ids)
+        max_refls = ndimage.maximum(refl_grid, labels, ids)
+
+        # Weighted sums over the labeled gates only.
+        # Shift each gate by its polygon's max before exponentiating so weights can't overflow
+        rows, cols = np.nonzero(labeled)
+        slots = np.searchsorted(ids, labels[labeled])
+        weights = np.exp(refl_grid[labeled] - max_refls[slots])
+        weight_sums = np.bincount(slots, weights=weights, minlength=ids.size)
+        lat_sums = np.bincount(slots, weights=weights * lats[rows], minlength=ids.size)
+        lon_sums = np.bincount(slots, weights=weights * lons[cols], minlength=ids.size)
+        stats = {
+            poly_id: (valid_count, max_refl, weight_sum, lat_sum, lon_sum)
+            for poly_id, valid_count, max_refl, weight_sum, lat_sum, lon_sum
+            in zip(ids.tolist(), valid_counts, max_refls, weight_sums, lat_sums, lon_sums)
+        }
 
         results = []
 
@@ -78,30 +141,17 @@ class CellDataSaver:
             if poly_id == 0:
                 continue
 
-            # Mask gates belonging to this polygon
-            mask = polygon_grid == poly_id
-            if not np.any(mask):
+            # Gates belonging to this polygon
+            gate_idx = gate_indices.get(poly_id)
+            if gate_idx is None or gate_idx.size == 0:
                 continue
 
-            # Extract reflectivity values inside polygon gates
-            refl_vals = refl_grid[mask]
-            lat_vals = lat_grid[mask]
-            lon_vals = lon_grid[mask]
-
-            valid_mask = ~np.isnan(refl_vals)
-            refl_vals = refl_vals[valid_mask]
-            lat_vals = lat_vals[valid_mask]
-            lon_vals = lon_vals[valid_mask]
-
-            # Max reflectivity
-            max_refl = float(np.nanmax(refl_vals)) if refl_vals.size > 0 else float('nan')
-
-            # Exponential reflectivity weights
-            if refl_vals.size > 0:
-                max_refl = float(np.nanmax(refl_vals))
-                weights = np.exp(refl_vals)
-                lat_centroid = float(np.sum(lat_vals * weights) / np.sum(weights))
-                lon_centroid = float(np.sum(lon_vals * weights) / np.sum(weights))
+            # Max reflectivity and exponential reflectivity-weighted centroid
+            valid_count, max_refl, weight_sum, lat_sum, lon_sum = stats[poly_id]
+            if valid_count > 0:
+                max_refl = float(max_refl)
+                lat_centroid = float(lat_sum / weight_sum)
+                lon_centroid = float(lon_sum / weight_sum)
                 lon_centroid = lon_centroid % 360  # wrap longitude to 0–360
                 centroid = (lat_centroid, lon_centroid)
             else:
@@ -109,7 +159,7 @@ class CellDataSaver:
                 centroid = (np.nan, np.nan)
 
             # Count number of gates
-            num_gates = np.count_nonzero(mask)
+            num_gates = gate_idx.size
 
             # Find hailcore
             hail_core = self.__create_hailcore_polygon(poly_id)
@@ -1,12 +1,23 @@
+import numpy as np
 import xarray as xr
-import json
+import orjson
 import re
 import datetime
-from datetime import datetime
+from datetime import datetime, timezone
 from pathlib import Path
 from util.io import IOManager
 import cfgrib
 
+io_manager = IOManager("[CellDetection]")
+
+# Filename timestamp patterns, tried in priority order by find_timestamp
+TIMESTAMP_PATTERNS = [
+    re.compile(r'MRMS_MergedReflectivityQC_3D_(\d{8})-(\d{6})'),
+    re.compile(r'(\d{8})-(\d{6})_renamed'),
+    re.compile(r'(\d{8}-\d{6})'),
+    re.compile(r's(\d{4})(\d{3})(\d{2})(\d{2})(\d{2})(\d)')
+]
+
 class DetectionDataHandler:
     def __init__(self, radar_path, ps_path, preciptype_path, io_manager, lat_min, lat_max, lon_min, lon_max):
         """
@@ -45,6 +56,9 @@ class DetectionDataHandler:
 
             # Subset dataset (lazy; data not fully loaded yet)
             dataset = ds.sel(latitude=lat_slice, longitude=lon_slice)
+
+            # Reflectivity only needs float32; coordinates stay float64 for polygon tests
+            dataset['unknown'] = dataset['unknown'].astype(np.float32, copy=False)
             self.io_manager.write_debug(f"Radar subset prepared for lat: {self.lat_grid}, lon: {self.lon_grid}")
 
             return dataset
@@ -68,6 +82,9 @@ class DetectionDataHandler:
 
             # Subset dataset (lazy; data not fully loaded yet)
             dataset = ds.sel(latitude=lat_slice, longitude=lon_slice)
+
+            # PrecipFlag categories are small integers, exact in float32
+            dataset['unknown'] = dataset['unknown'].astype(np.float32, copy=False)
             self.io_manager.write_debug(f"PrecipType subset prepared for lat: {self.lat_grid}, lon: {self.lon_grid}")
 
             return dataset
@@ -81,8 +98,8 @@ class DetectionDataHandler:
         returning only polygons with at least one vertex in the lat/lon range.
         """
         try:
-            with open(self.ps_path, 'r') as f:
-                data = json.load(f)
+            with open(self.ps_path, 'rb') as f:
+                data = orjson.loads(f.read())
             self.io_manager.write_debug(f"Loaded ProbSevere JSON: {self.ps_path}")
 
             lat_min, lat_max = self.lat_grid
@@ -97,11 +114,13 @@ class DetectionDataHandler:
             filtered_features = []
 
             for feature in data.get('features', []):
-                polygon_coords = feature['geometry']['coordinates'][0]  # assuming single polygon
+                polygon_coords = np.asarray(feature['geometry']['coordinates'][0], dtype=np.float64)  # assuming single polygon
+                if polygon_coords.ndim != 2:
+                    continue
+                lon, lat = polygon_coords[:, 0], polygon_coords[:, 1]
 
                 # Keep feature if any point is within the lat/lon bounds
-                if any(lon_min <= lon <= lon_max and lat_min <= lat <= lat_max
-                    for lon, lat in polygon_coords):
+                if np.any((lon >= lon_min) & (lon <= lon_max) & (lat >= lat_min) & (lat <= lat_max)):
                     filtered_features.append(feature)
 
             data['features'] = filtered_features
@@ -117,19 +136,10 @@ class DetectionDataHandler:
         Finds timestamps in a file based on predetermined patterns
         """
         filename = Path(filepath).name
-        io_manager = IOManager("[CellDetection]")
         io_manager.write_debug(f"Extracting timestamp from filename: {filename}")
         
-        patterns = [
-            r'MRMS_MergedReflectivityQC_3D_(\d{8})-(\d{6})',
-            r'(\d{8})-(\d{6})_renamed',
-            r'(\d{8}-\d{6})',
-            r'.*(\d{8})-(\d{6}).*',
-            r's(\d{4})(\d{3})(\d{2})(\d{2})(\d{2})(\d)'
-        ]
-        
-        for pattern_idx, pattern in enumerate(patterns):
-            match = re.search(pattern, filename)
+        for pattern_idx, pattern in enumerate(TIMESTAMP_PATTERNS):
+            match = pattern.search(filename)
             if match:
                 groups = match.groups()
                 io_manager.write_debug(f"Pattern {pattern_idx+1} matched: {groups}")
@@ -153,6 +163,7 @@ class DetectionDataHandler:
                     io_manager.write_debug(f"Error formatting timestamp: {e}")
                     continue
         
-        fallback = datetime.utcnow().isoformat()
+        # Naive UTC, same format as the filename timestamps
+        fallback = datetime.now(timezone.utc).replace(tzinfo=None).isoformat()
         io_manager.write_debug(f"Using fallback timestamp: {fallback}")
         return fallback
\ No newline at end of file
@@ -1,3 +1,6 @@
+# Fields copied from the new scan onto a tracked cell
+UPDATE_FIELDS = ('id', 'num_gates', 'centroid', 'max_refl', 'bbox')
+
 class StormCellTracker:
     def __init__(self, ps_old, ps_new, io_manager):
         self.ps_old = ps_old
@@ -20,15 +23,10 @@ class StormCellTracker:
 
         for cell in entries:
             cell_id = int(cell['id'])
-            if cell_id in updated_map:
-                updated = updated_map[cell_id]
-
+            updated = updated_map.get(cell_id)
+            if updated is not None:
                 # Update only main fields, leave storm_history untouched
-                cell['id'] = updated.get('id', cell['id'])
-                cell['num_gates'] = updated.get('num_gates', cell['num_gates'])
-                cell['centroid'] = updated.get('centroid', cell['centroid'])
-                cell['max_refl'] = updated.get('max_refl', cell['max_refl'])
-                cell['bbox'] = updated.get('bbox', cell['bbox'])
+                cell.update({field: updated[field] for field in UPDATE_FIELDS if field in updated})
 
                 used_ids.add(cell_id)
                 updated_entries.append(cell)
@@ -37,9 +35,8 @@ class StormCellTracker:
                 # Cell not found in updated_data - mark for deletion
                 self.io_manager.write_debug(f"Removing cell {cell_id} (not found in new scan)")
 
-        # Add NEW cells
-        for cell in updated_data:
-            cell_id = int(cell['id'])
+        # Add NEW cells (in scan order)
+        for cell_id, cell in updated_map.items():
             if cell_id not in used_ids:
                 updated_entries.append(cell)
                 self.io_manager.write_debug(f"Added new cell {cell_id}")
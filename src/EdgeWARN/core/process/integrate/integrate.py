@@ -1,32 +1,108 @@
 from .utils import StormIntegrationUtils
 import xarray as xr
 import numpy as np
+try:
+    from bottleneck import nanmax  # C nanmax with lower per-call overhead on small slices
+except ImportError:
+    from numpy import nanmax
 import gc
 
+# ProbSevere variable mappings (target name, source property), flattened into each storm history entry
+PROBSEVERE_FIELDS = (
+    ('MLCAPE', 'MLCAPE'),
+    ('MUCAPE', 'MUCAPE'),
+    ('MLCIN', 'MLCIN'),
+    ('DCAPE', 'DCAPE'),
+    ('CAPE_M10M30', 'CAPE_M10M30'),
+    ('LCL', 'LCL'),
+    ('Wetbulb_0C_Hgt', 'WETBULB_0C_HGT'),
+    ('LLLR', 'LLLR'),
+    ('MLLR', 'MLLR'),
+    ('EBShear', 'EBSHEAR'),
+    ('SRH01km', 'SRH01KM'),
+    ('SRH02km', 'SRW02KM'),
+    ('SRW46km', 'SRW46KM'),
+    ('MeanWind_1-3kmAGL', 'MEANWIND_1-3kmAGL'),
+    ('LJA', 'LJA'),
+    ('CompRef', 'COMPREF'),
+    ('Ref10', 'REF10'),
+    ('Ref20', 'REF20'),
+    ('MESH', 'MESH'),
+    ('H50_Above_0C', 'H50_Above_0C'),
+    ('EchoTop50', 'EchoTop_50'),
+    ('VIL', 'VIL'),
+    ('MaxFED', 'MaxFED'),
+    ('MaxFCD', 'MaxFCD'),
+    ('AccumFCD', 'AccumFCD'),
+    ('MinFlashArea', 'MinFlashArea'),
+    ('TE@MaxFCD', 'TE@MaxFCD'),
+    ('FlashRate', 'FLASH_RATE'),
+    ('FlashDensity', 'FLASH_DENSITY'),
+    ('MaxLLAz', 'MAXLLAZ'),
+    ('p98LLAz', 'P98LLAZ'),
+    ('p98MLAz', 'P98MLAZ'),
+    ('MaxRC_Emiss', 'MAXRC_EMISS'),
+    ('ICP', 'ICP'),
+    ('PWAT', 'PWAT'),
+    ('avg_beam_hgt', 'AVG_BEAM_HGT')
+)
+
+def _coord_window(coord, lower, upper):
+    """
+    Index slice covering every value of a 1D coordinate within [lower, upper],
+    for ascending or descending coordinates. Empty if none fall inside.
+    """
+    inside = np.flatnonzero((coord >= lower) & (coord <= upper))
+    if inside.size == 0:
+        return slice(0, 0)
+    return slice(inside[0], inside[-1] + 1)
+
+def _to_floats(raw_values):
+    """
+    Convert a column of raw property values with float() semantics in one NumPy cast.
+    Values that can't be converted become "MATCH_ERROR". Any NaN from the bulk cast is
+    re-checked with float(), since the cast also turns None into NaN.
+    """
+    try:
+        converted = np.fromiter(raw_values, dtype=object, count=len(raw_values)).astype(np.float64)
+    except (TypeError, ValueError):
+        converted = None
+
+    if converted is None:
+        suspects = range(len(raw_values))
+        values = [None] * len(raw_values)
+    else:
+        suspects = np.flatnonzero(np.isnan(converted)).tolist()
+        values = converted.tolist()
+
+    for i in suspects:
+        try:
+            values[i] = float(raw_values[i])
+        except (TypeError, ValueError):
+            values[i] = "MATCH_ERROR"
+
+    return values
+
 class StormCellIntegrator:
     def __init__(self, io_manager):
         self.io_manager = io_manager
 
-    def integrate_ds_via_max(self, dataset_path, storm_cells, output_key):
+    def load_grid(self, dataset_path, bboxes=None):
         """
-        Integrate a dataset over storm cells, storing the result in each cell's storm_history.
-        Saves maximum value of the dataset in each storm cell.
-        Handles both 1D and 2D lat/lon coordinates.
-        Fully loads dataset into memory, no subsetting.
+        Load a dataset's 'unknown' variable and lat/lon coordinates as NumPy arrays,
+        then close the dataset. Negative values are masked to NaN and 1D coordinates
+        are flipped to ascending order (with the values) so bboxes map to index slices.
+        If bboxes (from StormIntegrationUtils.build_bbox_soa) is given and the grid is
+        1D, only the lat/lon window enclosing every valid cell bbox is read from disk.
+        Returns (var_vals, lat_vals, lon_vals), or an error marker string on failure.
         """
-
-        self.io_manager.write_debug(f"Integrating dataset for {len(storm_cells)} storm cells")
-
-        # Step 1: Load dataset directly (no subsetting)
+        # Step 1: Open dataset lazily; values are only read once the window is known
         try:
             if dataset_path.endswith(".grib2"):
                 ds = xr.open_dataset(dataset_path, engine="cfgrib", decode_timedelta=True)
             else:
                 ds = xr.open_dataset(dataset_path, decode_timedelta=True)
 
-            ds.load()  # load entire dataset
-            self.io_manager.write_debug(f"Dataset loaded successfully with shape {list(ds.sizes.values())}")
-
             # Identify coordinate names
             lat_name = "latitude" if "latitude" in ds.coords else "lat"
             lon_name = "longitude" if "longitude" in ds.coords else "lon"
@@ -34,83 +110,200 @@ class StormCellIntegrator:
             # Check if dataset is empty
             if ds.sizes[lat_name] == 0 or ds.sizes[lon_name] == 0:
                 self.io_manager.write_warning("Dataset empty")
-                for cell in storm_cells:
-                    if cell.get("storm_history"):
-                        cell["storm_history"][-1][output_key] = "EMPTY_DATASET"
                 ds.close()
-                return storm_cells
+                return "EMPTY_DATASET"
 
-        except MemoryError:
-            self.io_manager.write_error("Dataset too large to load into memory")
-            for cell in storm_cells:
-                if cell.get("storm_history"):
-                    cell["storm_history"][-1][output_key] = "MEMORY_ERROR"
-            return storm_cells
         except Exception as e:
             self.io_manager.write_error(f"Failed to load dataset: {e}")
-            for cell in storm_cells:
-                if cell.get("storm_history"):
-                    cell["storm_history"][-1][output_key] = "DATASET_LOAD_ERROR"
-            return storm_cells
+            return "DATASET_LOAD_ERROR"
 
         # Step 2: Select variable
         var = ds.get("unknown")
         if var is None:
             self.io_manager.write_error("Variable 'unknown' not found in dataset")
-            for cell in storm_cells:
-                if cell.get("storm_history"):
-                    cell["storm_history"][-1][output_key] = "VAR_NOT_FOUND"
             ds.close()
-            return storm_cells
+            return "VAR_NOT_FOUND"
 
-        # Step 3: Get coordinates (can be 1D or 2D)
-        lat_vals = ds[lat_name].values
-        lon_vals = ds[lon_name].values
+        # Step 3: Get raw values and coordinates (can be 1D or 2D); negative values are invalid
+        try:
+            lat_vals = ds[lat_name].values
+            lon_vals = ds[lon_name].values
 
-        # Step 4: Process storm cells
-        for cell in storm_cells:
+            # Restrict to the union of the cell bboxes (inclusive, as in the per-cell reduction)
+            if (bboxes is not None and lat_vals.ndim == 1 and lon_vals.ndim == 1
+                    and lat_name in var.dims and lon_name in var.dims):
+                valid = bboxes['valid']
+                if valid.any():
+                    lat_window = _coord_window(lat_vals, bboxes['miny'][valid].min(), bboxes['maxy'][valid].max())
+                    lon_window = _coord_window(lon_vals, bboxes['minx'][valid].min(), bboxes['maxx'][valid].max())
+                else:
+                    lat_window = lon_window = slice(0, 0)
+                var = var.isel({lat_name: lat_window, lon_name: lon_window})
+                lat_vals = lat_vals[lat_window]
+                lon_vals = lon_vals[lon_window]
+
+            var_vals = np.ascontiguousarray(var.values)
+            self.io_manager.write_debug(f"Dataset loaded successfully with shape {list(var_vals.shape)}")
+
+        except MemoryError:
+            self.io_manager.write_error("Dataset too large to load into memory")
+            ds.close()
+            return "MEMORY_ERROR"
+        except Exception as e:
+            self.io_manager.write_error(f"Failed to load dataset: {e}")
+            ds.close()
+            return "DATASET_LOAD_ERROR"
+
+        # Mask negative values in place (NaN needs a float array we own).
+        # Integer grids up to 16 bits are exact in float32, which halves the reduction's memory traffic.
+        if not np.issubdtype(var_vals.dtype, np.floating):
+            var_vals = var_vals.astype(np.float32 if var_vals.dtype.itemsize <= 2 else np.float64)
+        elif not var_vals.flags.writeable:
+            var_vals = var_vals.copy()
+        np.copyto(var_vals, np.nan, where=var_vals < 0)
+
+        # 1D coordinates: make them ascending so searchsorted can map bounds to slices
+        if lat_vals.ndim == 1 and lon_vals.ndim == 1:
+            if lat_vals.size > 1 and lat_vals[0] > lat_vals[-1]:
+                lat_vals = lat_vals[::-1]
+                var_vals = var_vals[..., ::-1, :]
+            if lon_vals.size > 1 and lon_vals[0] > lon_vals[-1]:
+                lon_vals = lon_vals[::-1]
+                var_vals = var_vals[..., :, ::-1]
+
+        # Cleanup; only the NumPy arrays are kept
+        ds.close()
+        del var, ds
+        gc.collect()
+
+        return var_vals, lat_vals, lon_vals
+
+    def integrate_ds_via_max(self, dataset_path, storm_cells, output_key):
+        """
+        Integrate a dataset over storm cells, storing the result in each cell's storm_history.
+        Saves maximum value of the dataset in each storm cell.
+        Handles both 1D and 2D lat/lon coordinates.
+        Only the region covering the storm cells is loaded for 1D grids.
+        """
+        self.io_manager.write_debug(f"Integrating dataset for {len(storm_cells)} storm cells")
+        bboxes = StormIntegrationUtils.build_bbox_soa(storm_cells)
+        grid = self.load_grid(dataset_path, bboxes)
+        return self.integrate_grid_via_max(grid, storm_cells, output_key, bboxes)
+
+    def integrate_grid_via_max(self, grid, storm_cells, output_key, bboxes=None):
+        """
+        Same as integrate_ds_via_max, but over a grid already returned by load_grid().
+        If the grid is an error marker, it is stored in each cell instead.
+        bboxes is the table from StormIntegrationUtils.build_bbox_soa(storm_cells);
+        pass it in to reuse it across datasets, otherwise it is built here.
+        """
+        return self.integrate_multi([(output_key, grid)], storm_cells, bboxes)
+
+    def _cell_windows(self, grid, bboxes, active_idx):
+        """
+        Per-cell slice bounds and has-valid flags of one regular (1D lat/lon) grid,
+        for the cells at active_idx in the bboxes table.
+        """
+        var_vals, lat_vals, lon_vals = grid
+        minx, miny = bboxes['minx'][active_idx], bboxes['miny'][active_idx]
+        maxx, maxy = bboxes['maxx'][active_idx], bboxes['maxy'][active_idx]
+
+        # Inclusive bounds, same as the >= / <= mask; one searchsorted per edge for all cells
+        i0, i1 = np.searchsorted(lat_vals, miny, 'left'), np.searchsorted(lat_vals, maxy, 'right')
+        j0, j1 = np.searchsorted(lon_vals, minx, 'left'), np.searchsorted(lon_vals, maxx, 'right')
+
+        # Valid-gate count per bbox from a summed-area table, so empty bboxes skip the reduction
+        valid = ~np.isnan(var_vals)
+        if valid.ndim > 2:
+            valid = valid.any(axis=tuple(range(valid.ndim - 2)))
+        table = np.zeros((valid.shape[0] + 1, valid.shape[1] + 1), dtype=np.int64)
+        np.cumsum(np.cumsum(valid, axis=0), axis=1, out=table[1:, 1:])
+        has_valid = (table[i1, j1] - table[i0, j1] - table[i1, j0] + table[i0, j0]) > 0
+
+        return i0, i1, j0, j1, has_valid
+
+    def integrate_multi(self, grids, storm_cells, bboxes=None):
+        """
+        Integrate several grids from load_grid() over the storm cells in one pass.
+        grids is a list of (output_key, grid) pairs; each cell's latest storm_history
+        entry gets all keys in a single update. Error-marker grids are stored as-is.
+        """
+        # Step 4: Select cells with a storm history; cells without valid geometry get 0
+        if bboxes is None:
+            bboxes = StormIntegrationUtils.build_bbox_soa(storm_cells)
+
+        active = []
+        for k, cell in enumerate(storm_cells):
             if not cell.get("storm_history"):
                 continue
 
             latest = cell["storm_history"][-1]
-            poly = StormIntegrationUtils.create_cell_polygon(cell)
-            if poly is None:
-                latest[output_key] = 0
+            if not bboxes['valid'][k]:
+                latest.update({key: grid if isinstance(grid, str) else 0 for key, grid in grids})
                 continue
 
-            try:
-                if lat_vals.ndim == 1 and lon_vals.ndim == 1:
-                    mask = np.logical_and.outer(
-                        (lat_vals >= poly.bounds[1]) & (lat_vals <= poly.bounds[3]),
-                        (lon_vals >= poly.bounds[0]) & (lon_vals <= poly.bounds[2])
-                    )
-                else:
-                    mask = (
-                        (lat_vals >= poly.bounds[1]) & (lat_vals <= poly.bounds[3]) &
-                        (lon_vals >= poly.bounds[0]) & (lon_vals <= poly.bounds[2])
-                    )
-
-                subset_vals = var.where(mask & (var >= 0))
-                if subset_vals.size == 0 or np.all(np.isnan(subset_vals)):
-                    latest[output_key] = 0
-                else:
-                    latest[output_key] = float(np.nanmax(subset_vals))
+            active.append((cell, latest))
+
+        active_idx = np.flatnonzero(bboxes['valid'])
+        minx, miny = bboxes['minx'][active_idx], bboxes['miny'][active_idx]
+        maxx, maxy = bboxes['maxx'][active_idx], bboxes['maxy'][active_idx]
 
-            except Exception as e:
-                self.io_manager.write_error(f"Processing cell {cell.get('id', 'unknown')}: {e}")
-                latest[output_key] = "PROCESSING_ERROR"
+        # Per-grid slice bounds up front; None for grids without 1D coordinates
+        windows = []
+        for _, grid in grids:
+            if isinstance(grid, str):
+                windows.append(None)
+                continue
+            _, lat_vals, lon_vals = grid
+            regular_grid = lat_vals.ndim == 1 and lon_vals.ndim == 1
+            windows.append(self._cell_windows(grid, bboxes, active_idx) if regular_grid else None)
+
+        # Step 5: Reduce each cell's slice of every grid. Maxima go into one array that is
+        # unboxed with a single tolist(); zeros and error markers are kept per cell.
+        out = np.empty((len(active), len(grids)))
+        reduced = np.zeros(out.shape, dtype=bool)
+        cell_values = []
+        for k, (cell, latest) in enumerate(active):
+            values = {}
+            for g, ((output_key, grid), window) in enumerate(zip(grids, windows)):
+                if isinstance(grid, str):
+                    values[output_key] = grid
+                    continue
+
+                var_vals, lat_vals, lon_vals = grid
+                if window is not None and not window[4][k]:
+                    values[output_key] = 0
+                    continue
 
-            finally:
                 try:
-                    del subset_vals, mask, poly
-                except Exception:
-                    pass
-                gc.collect()
+                    if window is not None:
+                        i0, i1, j0, j1, _ = window
+                        subset_vals = var_vals[..., i0[k]:i1[k], j0[k]:j1[k]]
+                    else:
+                        mask = (
+                            (lat_vals >= miny[k]) & (lat_vals <= maxy[k]) &
+                            (lon_vals >= minx[k]) & (lon_vals <= maxx[k])
+                        )
+                        subset_vals = var_vals[..., mask]
 
-        # Step 5: Cleanup
-        ds.close()
-        del var, ds
-        gc.collect()
+                    if subset_vals.size == 0 or np.all(np.isnan(subset_vals)):
+                        values[output_key] = 0
+                    else:
+                        out[k, g] = nanmax(subset_vals)
+                        reduced[k, g] = True
+
+                except Exception as e:
+                    self.io_manager.write_error(f"Processing cell {cell.get('id', 'unknown')}: {e}")
+                    values[output_key] = "PROCESSING_ERROR"
+
+            cell_values.append(values)
+
+        keys = [output_key for output_key, _ in grids]
+        for (_, latest), values, row, row_reduced in zip(active, cell_values, out.tolist(), reduced.tolist()):
+            latest.update({
+                key: value if is_reduced else values[key]
+                for key, value, is_reduced in zip(keys, row, row_reduced)
+            })
 
         return storm_cells
 
@@ -131,64 +324,29 @@ class StormCellIntegrator:
             for f in features
         }
 
-        # Variable mappings (key: target name, value: source property)
-        field_map = {
-            'MLCAPE': 'MLCAPE',
-            'MUCAPE': 'MUCAPE',
-            'MLCIN': 'MLCIN',
-            'DCAPE': 'DCAPE',
-            'CAPE_M10M30': 'CAPE_M10M30',
-            'LCL': 'LCL',
-            'Wetbulb_0C_Hgt': 'WETBULB_0C_HGT',
-            'LLLR': 'LLLR',
-            'MLLR': 'MLLR',
-            'EBShear': 'EBSHEAR',
-            'SRH01km': 'SRH01KM',
-            'SRH02km': 'SRW02KM',
-            'SRW46km': 'SRW46KM',
-            'MeanWind_1-3kmAGL': 'MEANWIND_1-3kmAGL',
-            'LJA': 'LJA',
-            'CompRef': 'COMPREF',
-            'Ref10': 'REF10',
-            'Ref20': 'REF20',
-            'MESH': 'MESH',
-            'H50_Above_0C': 'H50_Above_0C',
-            'EchoTop50': 'EchoTop_50',
-            'VIL': 'VIL',
-            'MaxFED': 'MaxFED',
-            'MaxFCD': 'MaxFCD',
-            'AccumFCD': 'AccumFCD',
-            'MinFlashArea': 'MinFlashArea',
-            'TE@MaxFCD': 'TE@MaxFCD',
-            'FlashRate': 'FLASH_RATE',
-            'FlashDensity': 'FLASH_DENSITY',
-            'MaxLLAz': 'MAXLLAZ',
-            'p98LLAz': 'P98LLAZ',
-            'p98MLAz': 'P98MLAZ',
-            'MaxRC_Emiss': 'MAXRC_EMISS',
-            'ICP': 'ICP',
-            'PWAT': 'PWAT',
-            'avg_beam_hgt': 'AVG_BEAM_HGT'
-        }
-
+        # Latest entries of cells that can take ProbSevere data, indexed by cell ID
+        cell_by_id = {}
         for cell in storm_cells:
             if not cell.get("storm_history"):
                 continue
 
             entry = cell["storm_history"][-1]
-            cell_id = str(cell.get('id'))
             if 'centroid' not in entry or len(entry['centroid']) < 2:
                 continue
 
-            match = feature_lookup.get(cell_id)
-            if not match:
-                continue
+            cell_by_id[str(cell.get('id'))] = entry
 
-            # Flatten values directly into the entry
-            for target_key, source_key in field_map.items():
-                try:
-                    entry[target_key] = float(match.get(source_key, 0))
-                except (TypeError, ValueError):
-                    entry[target_key] = "MATCH_ERROR"
+        # Entries to update, paired with their ProbSevere properties, one lookup per feature
+        matched = []
+        for feature_id, props in feature_lookup.items():
+            entry = cell_by_id.get(feature_id)
+            if entry is not None and props:
+                matched.append((entry, props))
+
+        # Flatten values directly into the entries, converting one field column at a time
+        for target_key, source_key in PROBSEVERE_FIELDS:
+            values = _to_floats([match.get(source_key, 0) for _, match in matched])
+            for (entry, _), value in zip(matched, values):
+                entry[target_key] = value
 
         return storm_cells
@@ -1,6 +1,6 @@
 import util.file as fs
 from EdgeWARN.core.process.integrate.integrate import StormCellIntegrator
-from EdgeWARN.core.process.integrate.utils import StatFileHandler
+from EdgeWARN.core.process.integrate.utils import StatFileHandler, StormIntegrationUtils
 from util.io import IOManager
 
 # ------------------------------
@@ -26,19 +26,30 @@ def main():
 
     result_cells = cells
 
-    # Integrate datasets
+    # Cell geometry doesn't depend on the dataset, so build the bounds table once
+    bboxes = StormIntegrationUtils.build_bbox_soa(cells)
+
+    # Load datasets; each is closed and only the storm region's arrays are kept
+    grids = []
     for name, outdir, key in datasets:
         try:
-            io_manager.write_debug(f"Integrating {name} data for {len(cells)} cells")
+            io_manager.write_debug(f"Loading {name} data for {len(cells)} cells")
             latest_file = fs.latest_files(outdir, 1)[-1]
             io_manager.write_debug(f"Using latest {name} file: {latest_file}")
+            grids.append((key, integrator.load_grid(latest_file, bboxes)))
 
-            result_cells = integrator.integrate_ds_via_max(latest_file, result_cells, key)
-            io_manager.write_debug(f"{name} integration completed successfully!")
-        
         except Exception as e:
             io_manager.write_error(f"Failed to integrate {name} data: {e}")
 
+    # Integrate all datasets in one pass over the cells
+    try:
+        result_cells = integrator.integrate_multi(grids, result_cells, bboxes)
+        io_manager.write_debug(f"Integrated {len(grids)} datasets successfully!")
+
+    except Exception as e:
+        io_manager.write_error(f"Failed to integrate MRMS datasets: {e}")
+    del grids
+
     # Integrate ProbSevere
     try:
         io_manager.write_debug(f"Integrating ProbSevere data for {len(cells)} cells")
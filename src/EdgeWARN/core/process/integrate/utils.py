@@ -1,14 +1,26 @@
 import numpy as np
 import xarray as xr
-import json
 from shapely.geometry import Polygon
 from datetime import datetime
 import re
 from pathlib import Path as PathLibPath
 from util.io import IOManager
+import util.file as fs
 
 io_manager = IOManager("[CellIntegration]")
 
+# Common timestamp patterns in meteorological files, tried in order by find_timestamp
+TIMESTAMP_PATTERNS = [
+    # YYYYMMDD_HHMMSS pattern
+    re.compile(r'(\d{8}[_\.-]\d{6})'),
+    # YYYYMMDD_HHMM pattern
+    re.compile(r'(\d{8}[_\.-]\d{4})'),
+    # YYYYMMDD pattern
+    re.compile(r'(\d{8})'),
+    # Unix timestamp pattern
+    re.compile(r'(\d{10,})')
+]
+
 class StatFileHandler:
     def __init__(self, io_manager):
         """
@@ -64,8 +76,7 @@ class StatFileHandler:
         
     def load_json(self, filepath):
         self.io_manager.write_debug(f"Loading JSON file {filepath}")
-        with open(filepath, 'r') as f:
-            data = json.load(f)
+        data = fs.read_json(filepath)
         if not data:
             self.io_manager.write_error(f"{filepath} did not have any data")
             return None
@@ -74,8 +85,8 @@ class StatFileHandler:
     
     def write_json(self, data, filepath):
         self.io_manager.write_debug(f"Writing to JSON file {filepath}")
-        with open(filepath, 'w') as f:
-            json.dump(data, f, indent=4)
+        # NaN-preserving, same format detect/main.py reads back on the next tick
+        fs.write_json(data, filepath)
         print(f"Successfully wrote to JSON file {filepath}")
     
     def find_timestamp(self, filepath):
@@ -90,20 +101,8 @@ class StatFileHandler:
         """
         filename = PathLibPath(filepath).name
         
-        # Common timestamp patterns in meteorological files
-        patterns = [
-            # YYYYMMDD_HHMMSS pattern
-            r'(\d{8}[_\.-]\d{6})',
-            # YYYYMMDD_HHMM pattern
-            r'(\d{8}[_\.-]\d{4})',
-            # YYYYMMDD pattern
-            r'(\d{8})',
-            # Unix timestamp pattern
-            r'(\d{10,})'
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, filename)
+        for pattern in TIMESTAMP_PATTERNS:
+            match = pattern.search(filename)
             if match:
                 timestamp_str = match.group(1)
                 
@@ -222,6 +221,71 @@ class StormIntegrationUtils:
         io_manager.write_warning(f"Cell {cell.get('id')} has invalid geometry, skipping")
         return None
 
+    @staticmethod
+    def bbox_bounds(cell, min_size=0.0):
+        """
+        Return the storm cell's bounds as (minx, miny, maxx, maxy) in lon/lat, from the
+        min/max of its bbox points without building a Polygon.
+        Fallbacks:
+            - bbox extent if available, with >= 3 finite points spanning a non-zero area
+              (no validity check: a self-intersecting bbox still uses its extent,
+              where create_cell_polygon would fall back to the centroid box)
+            - small box around centroid if the bbox is missing, degenerate or non-finite
+            - None if both fail
+        """
+        # Use bbox if available and has enough points; points are (lat, lon)
+        if 'bbox' in cell and cell['bbox'] and len(cell['bbox']) >= 3:
+            try:
+                pts = np.asarray(cell['bbox'], dtype=float)
+            except (TypeError, ValueError):
+                pts = None
+
+            if pts is not None and pts.ndim == 2 and pts.shape[1] >= 2 and np.isfinite(pts[:, :2]).all():
+                miny, minx = pts[:, :2].min(axis=0)
+                maxy, maxx = pts[:, :2].max(axis=0)
+                if maxx > minx and maxy > miny:
+                    return float(minx), float(miny), float(maxx), float(maxy)
+
+        # Fallback: small box around centroid
+        if 'centroid' in cell and len(cell['centroid']) >= 2:
+            lat, lon = cell['centroid'][0], cell['centroid'][1]
+            if lat is not None and lon is not None and np.isfinite(lat) and np.isfinite(lon):
+                d = max(min_size, 0.01)
+                return lon - d, lat - d, lon + d, lat + d
+
+        io_manager.write_warning(f"Cell {cell.get('id')} has invalid geometry, skipping")
+        return None
+
+    @staticmethod
+    def build_bbox_soa(storm_cells):
+        """
+        Build a table of storm-cell bounds as arrays, one slot per cell, so it can be
+        computed once and reused for every integrated dataset. Only cells with a
+        storm_history are considered; 'valid' is False where no geometry could be built.
+
+        Returns:
+            dict: {'minx', 'miny', 'maxx', 'maxy': float arrays (lon/lat), 'valid': bool array}
+        """
+        bounds = np.full((len(storm_cells), 4), np.nan)
+        valid = np.zeros(len(storm_cells), dtype=bool)
+
+        for k, cell in enumerate(storm_cells):
+            if not cell.get("storm_history"):
+                continue
+
+            cell_bounds = StormIntegrationUtils.bbox_bounds(cell)
+            if cell_bounds is not None:
+                bounds[k] = cell_bounds
+                valid[k] = True
+
+        return {
+            'minx': bounds[:, 0],
+            'miny': bounds[:, 1],
+            'maxx': bounds[:, 2],
+            'maxy': bounds[:, 3],
+            'valid': valid
+        }
+
     @staticmethod
     def create_polygon_mask(polygon, lat_grid, lon_grid):
         """
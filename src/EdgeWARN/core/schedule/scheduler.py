@@ -1,5 +1,8 @@
 import datetime
+import functools
 import time
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from EdgeWARN.core.ingest.download import FileFinder
 from EdgeWARN.core.ingest.config import base_dir, check_modifiers
@@ -62,8 +65,13 @@ class MRMSUpdateChecker:
     def all_sources_available(self, modifiers):
         """Check all MRMS modifiers for new data availability."""
         all_new = True
-        for modifier in modifiers:
-            if self.has_update(modifier):
+
+        # Remote checks are I/O-bound; run them concurrently and report in order
+        with ThreadPoolExecutor(max_workers=len(modifiers) or 1) as executor:
+            updates = list(executor.map(self.has_update, modifiers))
+
+        for modifier, updated in zip(modifiers, updates):
+            if updated:
                 print(f"[{modifier[0]}] New file available")
             else:
                 print(f"[{modifier[0]}] No new file")
@@ -80,29 +88,36 @@ class MRMSUpdateChecker:
         max_time = datetime.timedelta(hours=1)
         modifier_times = []
 
-        for modifier, _ in modifiers:
-            finder = FileFinder(reference_dt, base_dir, max_time, 10, io_manager)
-            files_with_timestamps = finder.lookup_files(modifier, verbose=False)
+        # Fetch every directory listing concurrently instead of one RTT after another
+        finder = FileFinder(reference_dt, base_dir, max_time, 10, io_manager)
+        with ThreadPoolExecutor(max_workers=len(modifiers) or 1) as executor:
+            listings = list(executor.map(lambda m: finder.lookup_files(m[0], verbose=False), modifiers))
+
+        for (modifier, _), files_with_timestamps in zip(modifiers, listings):
             if not files_with_timestamps:
                 if self.verbose:
                     print(f"[{modifier}] No remote files found in the last hour")
                 continue
 
-            ts_rounded = [ts.replace(second=0, microsecond=0) for _, ts in files_with_timestamps]
-            modifier_times.append(set(ts_rounded))
+            # Unix minutes as int64; timestamps are UTC-aware, so this is the minute rounded down
+            ts_rounded = np.fromiter(
+                (int(ts.timestamp()) // 60 for _, ts in files_with_timestamps),
+                dtype=np.int64, count=len(files_with_timestamps)
+            )
+            modifier_times.append(ts_rounded)
 
         if not modifier_times:
             if self.verbose:
                 print("[Scheduler] No files found in any modifier within the last hour")
             return None
 
-        common_minutes = set.intersection(*modifier_times)
-        if not common_minutes:
+        common_minutes = functools.reduce(np.intersect1d, modifier_times, np.unique(modifier_times[0]))
+        if common_minutes.size == 0:
             if self.verbose:
                 print("[Scheduler] No common timestamps across all modifiers in the last hour")
             return None
 
-        latest_common = max(common_minutes)
+        latest_common = datetime.datetime.fromtimestamp(int(common_minutes.max()) * 60, tz=datetime.timezone.utc)
         if self.verbose:
             print(f"[Scheduler] Latest common timestamp within 1h: {latest_common}")
         return latest_common
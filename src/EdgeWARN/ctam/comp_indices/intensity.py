@@ -1,8 +1,25 @@
+import numpy as np
 from EdgeWARN.ctam.utils import DataHandler, default_norm
 from util.io import IOManager
 
 io_manager = IOManager("[CTAM]")
 
+# Area of one radar gate (1.11 km x 1.11 km), for storm areas from num_gates
+_GATE_AREA = 1.11 ** 2
+
+def _as_float(value):
+    """float(value), or None if the value isn't numeric."""
+    try:
+        return float(value)
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+def _ratio(num, den):
+    """Elementwise num / den, with 0 where den == 0."""
+    out = np.zeros(np.broadcast(num, den).shape)
+    np.divide(num, den, out=out, where=den != 0)
+    return out
+
 class IntensityIndiceCalculator:
     """
     Calculator for storm cell intensity indices with normalization support.
@@ -31,272 +48,196 @@ class IntensityIndiceCalculator:
         self.data_handler.verify_norm_values(norm_values, default_norm)
         self.norm_values = norm_values
 
+        # Reciprocals of the nonzero norms, so normalizing is a multiply
+        self._inv_norm = {name: 1.0 / value for name, value in norm_values.items() if value}
+
+        # Latest storm_history entry per cell (None without history), resolved once
+        self._ids = [cell.get('id') for cell in self.stormcells]
+        self._latest = [cell['storm_history'][-1] if cell.get('storm_history') else None for cell in self.stormcells]
+        self._entries = [entry for entry in self._latest if entry is not None]
+        self._missing = [cell_id for cell_id, entry in zip(self._ids, self._latest) if entry is None]
+
+        # Storm-history fields as float64 columns over self._entries, filled on first use (see _extract)
+        self._cols = {}
+
+    def _latest_entries(self, name):
+        """Latest storm_history entry of every cell that has one; one warning covers the rest."""
+        if self._missing:
+            shown = ", ".join(str(cell_id) for cell_id in self._missing[:10])
+            more = f" (+{len(self._missing) - 10} more)" if len(self._missing) > 10 else ""
+            io_manager.write_warning(f"Skipping {name} for {len(self._missing)} cells - No history: {shown}{more}")
+        return self._entries
+
+    def _extract(self, entries, *fields):
+        """
+        Float64 column per field over the given entries, followed by a mask of the
+        entries where every field is numeric. Non-numeric values are stored as NaN.
+        Columns are cached, since every method works on the same self._entries.
+        """
+        columns = []
+        valid = np.ones(len(entries), dtype=bool)
+        for field in fields:
+            if field not in self._cols:
+                converted = [_as_float(entry.get(field)) for entry in entries]
+                numeric = np.array([v is not None for v in converted], dtype=bool)
+                values = np.array(converted, dtype=np.float64)  # None -> NaN
+                self._cols[field] = (values, numeric)
+
+            values, numeric = self._cols[field]
+            columns.append(values)
+            valid = valid & numeric
+        return (*columns, valid)
+
+    def _inv(self, *names):
+        """Reciprocals of the named norms, followed by whether all of them are nonzero."""
+        inv = [self._inv_norm.get(name, 0.0) for name in names]
+        return (*inv, all(inv))
+
+    @staticmethod
+    def _store(entries, key, values, valid, precision):
+        """Write rounded values into the entries; entries that aren't valid get 0."""
+        values = np.round(values, precision)
+        for entry, value, ok in zip(entries, values.tolist(), valid.tolist()):
+            entry[key] = value if ok else 0
+
+
     def calculate_composite_et(self, key='CompET', precision=2):
         """
         CompET = 0.1 * EchoTop18 + 0.3 * EchoTop30 + 0.6 * EchoTop50
         or 0.3 * EchoTop18 + 0.7 * EchoTop30 if EchoTop50 == 0
         """
-        for cell in self.stormcells:
-            latest_entry = cell.get('storm_history', [])[-1] if cell.get('storm_history') else None
-            if not latest_entry:
-                io_manager.write_warning(f"Skipping CompET for cell {cell.get('id')} - No history")
-                continue
-
-            et18 = latest_entry.get('EchoTop18')
-            et30 = latest_entry.get('EchoTop30')
-            et50 = latest_entry.get('EchoTop50')
-
-            if not all(isinstance(v, (int, float)) for v in [et18, et30, et50]):
-                latest_entry[key] = 0
-                continue
+        entries = self._latest_entries('CompET')
+        et18, et30, et50, valid = self._extract(entries, 'EchoTop18', 'EchoTop30', 'EchoTop50')
 
-            comp_et = 0.3 * et18 + 0.7 * et30 if et50 == 0 else 0.1 * et18 + 0.3 * et30 + 0.6 * et50
-            latest_entry[key] = round(comp_et, precision)
+        comp_et = np.where(et50 == 0, 0.3 * et18 + 0.7 * et30, 0.1 * et18 + 0.3 * et30 + 0.6 * et50)
+        self._store(entries, key, comp_et, valid, precision)
 
     def calculate_thl(self, thl_key='THL', thld_key='THLDensity', precision=2):
         """THL = VIL + VII; THLD = THL / EchoTop18"""
-        for cell in self.stormcells:
-            latest_entry = cell.get('storm_history', [])[-1] if cell.get('storm_history') else None
-            if not latest_entry:
-                io_manager.write_warning(f"Skipping THL, THLD for cell {cell.get('id')} - No history")
-                continue
-
-            vil = latest_entry.get('VIL')
-            vii = latest_entry.get('VII')
-            et18 = latest_entry.get('EchoTop18')
-
-            if not all(isinstance(v, (int, float)) for v in [vil, vii, et18]):
-                latest_entry[thl_key] = 0
-                latest_entry[thld_key] = 0
-                continue
+        entries = self._latest_entries('THL, THLD')
+        vil, vii, et18, valid = self._extract(entries, 'VIL', 'VII', 'EchoTop18')
 
-            latest_entry[thl_key] = round(vil + vii, precision)
-            latest_entry[thld_key] = round((vil + vii) / et18, precision)
+        thl = vil + vii
+        self._store(entries, thl_key, thl, valid, precision)
+        self._store(entries, thld_key, _ratio(thl, et18), valid, precision)
 
     def calculate_vii_density(self, key='VIIDensity', precision=2):
         """VIIDensity = VII / EchoTop18"""
-        for cell in self.stormcells:
-            latest_entry = cell.get('storm_history', [])[-1] if cell.get('storm_history') else None
-            if not latest_entry:
-                io_manager.write_warning(f"Skipping VIIDensity for {cell.get('id')} - No history")
-                continue
+        entries = self._latest_entries('VIIDensity')
+        vii, et18, valid = self._extract(entries, 'VII', 'EchoTop18')
 
-            vii = latest_entry.get('VII')
-            et18 = latest_entry.get('EchoTop18')
-
-            if not all(isinstance(v, (int, float)) for v in [vii, et18]) or et18 == 0:
-                latest_entry[key] = 0
-                continue
-
-            latest_entry[key] = round(vii / et18, precision)
+        self._store(entries, key, _ratio(vii, et18), valid & (et18 != 0), precision)
 
     def calculate_pii(self, key='PII', precision=2):
         """PII = (RALA / rala_norm) + (PrecipRate / preciprate_norm) + (MESH / mesh_norm)"""
-        for cell in self.stormcells:
-            latest_entry = cell.get('storm_history', [])[-1] if cell.get('storm_history') else None
-            if not latest_entry:
-                io_manager.write_warning(f"Skipping PII for {cell.get('id')} - No history")
-                continue
-
-            rala = latest_entry.get('RALA')
-            rala_norm = self.norm_values.get('RALA')
-            preciprate = latest_entry.get('PrecipRate')
-            preciprate_norm = self.norm_values.get('PrecipRate')
-            mesh = latest_entry.get('MESH')
-            mesh_norm = self.norm_values.get('MESH')
-
-            if not all(isinstance(v, (int, float)) for v in [rala, preciprate, mesh]):
-                latest_entry[key] = 0
-                continue
+        entries = self._latest_entries('PII')
+        rala, preciprate, mesh, valid = self._extract(entries, 'RALA', 'PrecipRate', 'MESH')
+        inv_rala, inv_preciprate, inv_mesh, norms_ok = self._inv('RALA', 'PrecipRate', 'MESH')
 
-            latest_entry[key] = round((rala / rala_norm) + (preciprate / preciprate_norm) + (mesh / mesh_norm), precision)
+        pii = rala * inv_rala + preciprate * inv_preciprate + mesh * inv_mesh
+        self._store(entries, key, pii, valid & norms_ok, precision)
 
     def calculate_trl(self, key='TRL', precision=2):
         """TRL = (VIL / vil_norm) * (max_refl / maxref_norm)"""
-        for cell in self.stormcells:
-            latest_entry = cell.get('storm_history', [])[-1] if cell.get('storm_history') else None
-            if not latest_entry:
-                io_manager.write_warning(f"Skipping TRL for {cell.get('id')} - No history")
-                continue
+        entries = self._latest_entries('TRL')
+        vil, maxref, valid = self._extract(entries, 'VIL', 'max_refl')
+        inv_vil, inv_maxref, norms_ok = self._inv('VIL', 'MaxRef')
 
-            vil = latest_entry.get('VIL')
-            vil_norm = self.norm_values.get('VIL')
-            maxref = latest_entry.get('max_refl')
-            maxref_norm = self.norm_values.get('MaxRef')
-
-            if not all(isinstance(v, (int, float)) for v in [vil, maxref]):
-                latest_entry[key] = 0
-                continue
-
-            latest_entry[key] = round((vil / vil_norm) * (maxref / maxref_norm), precision)
+        self._store(entries, key, vil * maxref * (inv_vil * inv_maxref), valid & norms_ok, precision)
 
     def calculate_dcs(self, key='DCS', precision=2):
         """DCS = (maxref / maxref_norm) * (et50 / et50_norm)"""
-        for cell in self.stormcells:
-            latest_entry = cell.get('storm_history', [])[-1] if cell.get('storm_history') else None
-            if not latest_entry:
-                io_manager.write_warning(f"Skipping DCS for {cell.get('id')} - No history")
-                continue
-
-            maxref = latest_entry.get('max_refl')
-            maxref_norm = self.norm_values.get('MaxRef')
-            et50 = latest_entry.get('EchoTop50')
-            et50_norm = self.norm_values.get('EchoTop50')
+        entries = self._latest_entries('DCS')
+        maxref, et50, valid = self._extract(entries, 'max_refl', 'EchoTop50')
+        inv_maxref, inv_et50, norms_ok = self._inv('MaxRef', 'EchoTop50')
 
-            if not all(isinstance(v, (int, float)) for v in [maxref, et50]):
-                latest_entry[key] = 0
-                continue
-
-            latest_entry[key] = round((maxref / maxref_norm) * (et50 / et50_norm), precision)
+        self._store(entries, key, maxref * et50 * (inv_maxref * inv_et50), valid & norms_ok, precision)
 
     def calculate_upper_ref_ratio(self, key='UpperLevelRefRatio', precision=2):
         """UpperLevelRefRatio = Ref20 / Ref10"""
-        for cell in self.stormcells:
-            latest_entry = cell.get('storm_history', [])[-1] if cell.get('storm_history') else None
-            if not latest_entry:
-                io_manager.write_warning(f"Skipping UpperLevelRefRatio for {cell.get('id')} - No history")
-                continue
-
-            ref10 = latest_entry.get('Ref10')
-            ref20 = latest_entry.get('Ref20')
+        entries = self._latest_entries('UpperLevelRefRatio')
+        ref10, ref20, valid = self._extract(entries, 'Ref10', 'Ref20')
 
-            if not all(isinstance(v, (int, float)) for v in [ref10, ref20]) or ref10 == 0:
-                latest_entry[key] = 0
-                continue
-
-            latest_entry[key] = round(ref20 / ref10, precision)
+        self._store(entries, key, _ratio(ref20, ref10), valid & (ref10 != 0), precision)
 
     def calculate_llint(self, key='LLInt', precision=2):
         """LLInt = (RALA / maxref) * EchoTop30"""
-        for cell in self.stormcells:
-            latest_entry = cell.get('storm_history', [])[-1] if cell.get('storm_history') else None
-            if not latest_entry:
-                io_manager.write_warning(f"Skipping LLInt for {cell.get('id')} - No history")
-                continue
-
-            rala = latest_entry.get('RALA')
-            maxref = latest_entry.get('max_refl')
-            et30 = latest_entry.get('EchoTop30')
-
-            if not all(isinstance(v, (float, int)) for v in [rala, maxref, et30]):
-                latest_entry[key] = 0
-                continue
+        entries = self._latest_entries('LLInt')
+        rala, maxref, et30, valid = self._extract(entries, 'RALA', 'max_refl', 'EchoTop30')
 
-            latest_entry[key] = round((rala / maxref) * et30, precision)
+        self._store(entries, key, _ratio(rala, maxref) * et30, valid, precision)
 
     def calculate_ulint(self, key='ULInt', precision=2):
         """ULInt = (max(ref10, ref20) / refupper_norm) * (1 + H50_Above_0C)"""
-        for cell in self.stormcells:
-            latest_entry = cell.get('storm_history', [])[-1] if cell.get('storm_history') else None
-            if not latest_entry:
-                io_manager.write_warning(f"Skipping ULInt for {cell.get('id')} - No history")
-                continue
-
-            ref10 = latest_entry.get('Ref10')
-            ref20 = latest_entry.get('Ref20')
-            refupper_norm = self.norm_values.get('RefUpper')
-            h50 = latest_entry.get('H50_Above_0C')
-
-            if not all(isinstance(v, (int, float)) for v in [ref10, ref20, h50]):
-                latest_entry[key] = 0
-                continue
+        entries = self._latest_entries('ULInt')
+        ref10, ref20, h50, valid = self._extract(entries, 'Ref10', 'Ref20', 'H50_Above_0C')
+        inv_refupper, norms_ok = self._inv('RefUpper')
 
-            latest_entry[key] = round((max(ref10, ref20) / refupper_norm) * (1 + h50), precision)
+        # Same pick as the builtin max(ref10, ref20), including when either is NaN
+        ref_upper = np.where(ref20 > ref10, ref20, ref10)
+        self._store(entries, key, ref_upper * inv_refupper * (1 + h50), valid & norms_ok, precision)
 
     def calculate_flash_area_ratio(self, key='FlashAreaRatio', precision=2):
         """FlashAreaRatio = MinFlashArea / (num_gates * 1.11^2)"""
-        for cell in self.stormcells:
-            latest_entry = cell.get('storm_history', [])[-1] if cell.get('storm_history') else None
-            if not latest_entry:
-                io_manager.write_warning(f"Skipping FlashAreaRatio for {cell.get('id')} - No history")
-                continue
+        entries = self._latest_entries('FlashAreaRatio')
+        num_gates, minflasharea, valid = self._extract(entries, 'num_gates', 'MinFlashArea')
 
-            num_gates = latest_entry.get('num_gates')
-            minflasharea = latest_entry.get('MinFlashArea')
-
-            if not all(isinstance(v, (int, float)) for v in [num_gates, minflasharea]):
-                latest_entry[key] = 0
-                continue
-
-            storm_area = num_gates * (1.11 ** 2)
-            latest_entry[key] = round(minflasharea / storm_area, precision)
+        storm_area = num_gates * _GATE_AREA
+        self._store(entries, key, _ratio(minflasharea, storm_area), valid, precision)
 
     def calculate_flash_ratio(self, key='FlashRatio', precision=2):
         """FlashRatio = CGFlashDensity / FlashDensity"""
-        for cell in self.stormcells:
-            latest_entry = cell.get('storm_history', [])[-1] if cell.get('storm_history') else None
-            if not latest_entry:
-                io_manager.write_warning(f"Skipping FlashRatio for {cell.get('id')} - No history")
-                continue
-
-            cg_flash = latest_entry.get('CGFlashDensity')
-            flash = latest_entry.get('FlashDensity')
+        entries = self._latest_entries('FlashRatio')
+        cg_flash, flash, valid = self._extract(entries, 'CGFlashDensity', 'FlashDensity')
 
-            if not all(isinstance(v, (int, float)) for v in [cg_flash, flash]):
-                latest_entry[key] = 0
-                continue
-
-            latest_entry[key] = 9999 if flash == 0 else round(cg_flash / flash, precision)
+        # 9999 flags cells without any flashes; it is unaffected by rounding
+        flash_ratio = np.where(flash == 0, 9999, _ratio(cg_flash, flash))
+        self._store(entries, key, flash_ratio, valid, precision)
 
     def calculate_nli(self, key='NLI', precision=2):
         """NLI = FlashRate / StormArea; StormArea = num_gates * 1.11^2"""
-        for cell in self.stormcells:
-            latest_entry = cell.get('storm_history', [])[-1] if cell.get('storm_history') else None
-            if not latest_entry:
-                io_manager.write_warning(f"Skipping NLI for {cell.get('id')} - No history")
-                continue
-
-            flashrate = latest_entry.get('FlashRate')
-            num_gates = latest_entry.get('num_gates')
+        entries = self._latest_entries('NLI')
+        flashrate, num_gates, valid = self._extract(entries, 'FlashRate', 'num_gates')
 
-            if not all(isinstance(v, (int, float)) for v in [flashrate, num_gates]) or num_gates == 0:
-                latest_entry[key] = 0
-                continue
-
-            storm_area = num_gates * (1.11 ** 2)
-            latest_entry[key] = round(flashrate / storm_area, precision)
+        storm_area = num_gates * _GATE_AREA
+        self._store(entries, key, _ratio(flashrate, storm_area), valid & (num_gates != 0), precision)
 
     def calculate_flash_compact_index(self, key='FlashCompactIndex', precision=2):
         """FlashCompactIndex = MaxFCD / MaxFED"""
-        for cell in self.stormcells:
-            latest_entry = cell.get('storm_history', [])[-1] if cell.get('storm_history') else None
-            if not latest_entry:
-                io_manager.write_warning(f"Skipping FlashCompactIndex for {cell.get('id')} - No history")
-                continue
-
-            maxfcd = latest_entry.get('MaxFCD')
-            maxfed = latest_entry.get('MaxFED')
+        entries = self._latest_entries('FlashCompactIndex')
+        maxfcd, maxfed, valid = self._extract(entries, 'MaxFCD', 'MaxFED')
 
-            if not all(isinstance(v, (int, float)) for v in [maxfcd, maxfed]) or maxfed == 0:
-                latest_entry[key] = 0
-                continue
+        self._store(entries, key, _ratio(maxfcd, maxfed), valid & (maxfed != 0), precision)
 
-            latest_entry[key] = round(maxfcd / maxfed, precision)
+    def calculate_all(self, precision=2):
+        """
+        Calculates every intensity index with its default key. The shared fields
+        (EchoTop18, VIL, max_refl, num_gates, ...) are extracted once for all of them.
+        """
+        self.calculate_composite_et(precision=precision)
+        self.calculate_thl(precision=precision)
+        self.calculate_vii_density(precision=precision)
+        self.calculate_pii(precision=precision)
+        self.calculate_trl(precision=precision)
+        self.calculate_dcs(precision=precision)
+        self.calculate_upper_ref_ratio(precision=precision)
+        self.calculate_ulint(precision=precision)
+        self.calculate_llint(precision=precision)
+        self.calculate_flash_area_ratio(precision=precision)
+        self.calculate_flash_ratio(precision=precision)
+        self.calculate_nli(precision=precision)
+        self.calculate_flash_compact_index(precision=precision)
 
     def return_results(self):
         """Returns the storm cells with all calculated indices."""
         return self.stormcells
 
 if __name__ == "__main__":
-    import json
-    with open("stormcell_test.json", 'r') as f:
-        stormcells = json.load(f)
+    import util.file as fs
+    stormcells = fs.read_json("stormcell_test.json")
     
     calculator = IntensityIndiceCalculator(stormcells)
-    calculator.calculate_composite_et()
-    calculator.calculate_thl()
-    calculator.calculate_vii_density()
-    calculator.calculate_pii()
-    calculator.calculate_trl()
-    calculator.calculate_dcs()
-    calculator.calculate_upper_ref_ratio()
-    calculator.calculate_ulint()
-    calculator.calculate_llint()
-    calculator.calculate_flash_area_ratio()
-    calculator.calculate_flash_ratio()
-    calculator.calculate_nli()
-    calculator.calculate_flash_compact_index()
+    calculator.calculate_all()
 
     stormcells = calculator.return_results()
-    with open("stormcell_test.json", 'w') as f:
-        json.dump(stormcells, f, indent=2)
+    fs.write_json(stormcells, "stormcell_test.json")
@@ -1,8 +1,9 @@
-import json
 import xarray as xr
+import util.file as fs
 from pathlib import Path
 from util.io import IOManager
 from datetime import datetime
+from functools import lru_cache
 
 io_manager = IOManager(f"[CTAM]")
 
@@ -52,6 +53,11 @@ default_norm = { # 0 indicates that we haven't decided what value we use
     "PWAT": 1.5,
 }
 
+@lru_cache(maxsize=4096)
+def _parse_ts(timestamp):
+    """datetime.fromisoformat, memoized; cells share the same scan timestamps."""
+    return datetime.fromisoformat(timestamp)
+
 class DataLoader:
     
     @staticmethod
@@ -66,8 +72,7 @@ class DataLoader:
         """
         path = Path(json_path)
         if path.exists():
-            with open(json_path, 'r') as f:
-                data = json.load(f)
+            data = fs.read_json(json_path)
             
             io_manager.write_debug("Successfully loaded JSON file")
             return data
@@ -122,8 +127,17 @@ class DataLoader:
     
 class DataHandler:
     def __init__(self, stormcells):
-        # Pre-index by ID for constant-time lookup
-        self.stormcells = {str(cell["id"]): cell for cell in stormcells}
+        self.stormcells = stormcells
+
+    @property
+    def stormcells(self):
+        return self._stormcells
+
+    @stormcells.setter
+    def stormcells(self, stormcells):
+        # Pre-index by ID for constant-time lookup; memoized history lookups belong to the old cells
+        self._stormcells = {str(cell["id"]): cell for cell in stormcells}
+        self._hist_index = {}  # (cell_id, key) -> [(value, datetime)]
 
     @staticmethod
     def verify_norm_values(norm_values, default_norm):
@@ -179,17 +193,24 @@ class DataHandler:
         
         Returns:
             list of (value, datetime_object) entries
+
+        Results are memoized per (cell_id, key); assigning stormcells clears them.
         """
-        entries = []
+        cell_id = str(cell_id)
+        cached = self._hist_index.get((cell_id, key))
+        if cached is not None:
+            return list(cached)
 
         # Find cell ID
-        cell = self.stormcells.get(str(cell_id))
+        cell = self.stormcells.get(cell_id)
         if cell:
             if 'storm_history' in cell:
-                for history in cell['storm_history']:
-                    if key in history:
-                        entries.append((history[key], datetime.fromisoformat(history['timestamp'])))
-                return entries
+                entries = [
+                    (history[key], _parse_ts(history['timestamp']))
+                    for history in cell['storm_history'] or () if key in history
+                ]
+                self._hist_index[(cell_id, key)] = entries
+                return list(entries)
             
             else:
                 io_manager.write_error(f"storm_history not in cell {cell_id}")
@@ -24,15 +24,12 @@ print(f"Latitude limits: {tuple(args.lat_limits)}, Longitude limits: {tuple(args
 lat_limits = tuple(args.lat_limits)
 lon_limits = tuple(args.lon_limits)
 
-def pipeline(log_queue, dt):
-    """Run the full ingestion → detection → integration pipeline once, logging to queue."""
-    def log(msg):
-        log_queue.put(f"{msg}")
-
+def pipeline(dt):
+    """Run the full ingestion → detection → integration pipeline once; logs go straight to stdout."""
     try:
-        log(f"Starting Data Ingestion for timestamp {dt}")
+        print(f"Starting Data Ingestion for timestamp {dt}")
         ingest_main.download_all_files(dt)
-        log("Starting Storm Cell Detection")
+        print("Starting Storm Cell Detection")
         try:
             filepath_old, filepath_new = fs.latest_files(fs.MRMS_COMPOSITE_DIR, 2) 
             ps_old, ps_new = fs.latest_files(fs.MRMS_PROBSEVERE_DIR, 2)
@@ -45,9 +42,9 @@ def pipeline(log_queue, dt):
         
         detect.main(filepath_old, filepath_new, ps_old, ps_new, pt_old, pt_new, lat_limits, lon_limits, Path("stormcell_test.json"))
         integration.main()
-        log("Pipeline completed successfully")
+        print("Pipeline completed successfully")
     except Exception as e:
-        log(f"Error in pipeline: {e}")
+        print(f"Error in pipeline: {e}")
 
 def main():
     """Scheduler: spawn pipeline() every 15 s if a new latest_common timestamp is available."""
@@ -65,20 +62,11 @@ def main():
                 dt = latest_common
                 last_processed = latest_common
 
-                # Queue to capture logs
-                log_queue = multiprocessing.Queue()
-
-                # Spawn the pipeline process
-                proc = multiprocessing.Process(target=pipeline, args=(log_queue, dt))
+                # Spawn the pipeline process; it prints through the same timestamped stdout
+                proc = multiprocessing.Process(target=pipeline, args=(dt,))
                 proc.start()
                 print(f"Spawned pipeline process PID={proc.pid}")
 
-                # Print logs in real-time
-                while proc.is_alive() or not log_queue.empty():
-                    while not log_queue.empty():
-                        print(log_queue.get())
-                    time.sleep(1)
-
                 proc.join()
                 print(f"Pipeline process PID={proc.pid} finished")
             else:
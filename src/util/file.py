@@ -1,6 +1,11 @@
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+import heapq
+import json
+import os
 import platform
 from datetime import datetime
+import numpy as np
 from util.io import IOManager
 
 io_manager = IOManager("[Util]")
@@ -23,6 +28,58 @@ MRMS_RHOHV_DIR = BASE_DIR / "RhoHV"
 MRMS_PRECIPTYP_DIR = BASE_DIR / "PrecipFlag"
 STORMCELL_JSON = Path("stormcell_test.json")
 TEMP_DIR = BASE_DIR / "tmp"
+DETECT_CACHE_DIR = Path(".cache") / "detect"
+
+def stat_or_none(path):
+    """
+    Stat a path with a single syscall
+    Inputs:
+    - path: Path to stat
+    Outputs:
+    - os.stat_result, or None if the path doesn't exist
+    """
+    try:
+        return path.stat()
+    except FileNotFoundError:
+        return None
+
+def _json_default(obj):
+    """
+    JSON fallback for types the stdlib encoder doesn't know
+    Inputs:
+    - obj: Object to serialize
+    Outputs:
+    - NumPy scalars/arrays as native numbers/lists, anything else as str
+    """
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    return str(obj)
+
+def read_json(path):
+    """
+    Load a storm cell JSON file written by write_json
+    Inputs:
+    - path: JSON file
+    Outputs:
+    - Parsed data; NaN values come back as float('nan')
+    """
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def write_json(data, path, indent=2):
+    """
+    Write storm cell data as JSON
+    Uses the stdlib encoder because it keeps NaN (e.g. centroids of cells without
+    valid reflectivity) as NaN, where orjson would write null and break the next load
+    Inputs:
+    - data: Data to write
+    - path: JSON file
+    - indent: Indentation level
+    """
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=indent, default=_json_default)
 
 # NEW LATEST FILES FUNCTION
 def latest_files(dir, n):
@@ -34,16 +91,21 @@ def latest_files(dir, n):
     Outputs:
     - List of files (oldest to newest) in the directory
     """
-    if not dir.exists():
+    # One os.scandir pass: DirEntry.is_file() reuses the readdir file type, so each file costs a single stat
+    try:
+        entries = os.scandir(dir)
+    except FileNotFoundError:
         io_manager.write_warning(f"{dir} doesn't exist!")
         return
-    files = sorted(
-        [f for f in dir.glob("*") if f.is_file() and f.suffix.lower() != ".idx"],
-        key=lambda f: f.stat().st_mtime
-    )
+    with entries:
+        files = [
+            (entry.stat().st_mtime, entry.path) for entry in entries
+            if entry.is_file() and not entry.name.lower().endswith(".idx")
+        ]
     if len(files) < n:
         raise RuntimeError(f"Not enough files in {dir}")
-    return [str(f) for f in files[-n:]]
+    # Only the newest n are needed; no need to sort the whole directory
+    return [f for _, f in reversed(heapq.nlargest(n, files))]
 
 def clean_idx_files(folders):
     """
@@ -53,7 +115,10 @@ def clean_idx_files(folders):
     """
     for folder in folders:
         if folder.exists():
-            idx_files = list(folder.rglob("*.idx"))
+            idx_files = [
+                os.path.join(root, name)
+                for root, _, names in os.walk(folder) for name in names if name.endswith(".idx")
+            ]
             if len(idx_files) == 0:
                 io_manager.write_debug(f"No IDX files in folder: {folder}")
                 return
@@ -61,7 +126,7 @@ def clean_idx_files(folders):
                 deleted_files = 0
                 for f in idx_files:
                     try:
-                        f.unlink()
+                        os.unlink(f)
                         deleted_files += 1
                     except Exception as e:
                         io_manager.write_error(f"Failed to delete IDX file {f}: {e}")
@@ -79,12 +144,45 @@ def wipe_temp():
 
 # ---------- CLEANUP ----------
 def clean_old_files(directory: Path, max_age_minutes=60):
-    now = datetime.now().timestamp()
-    cutoff = now - (max_age_minutes * 60)
-    for f in directory.glob("*"):
-        if f.is_file() and f.stat().st_mtime < cutoff:
+    cutoff = datetime.now().timestamp() - (max_age_minutes * 60)
+    _clean_dir(directory, cutoff)
+
+def _clean_dir(directory, cutoff=None):
+    """
+    Delete files in a directory with a single os.scandir pass
+    Inputs:
+    - directory: Directory to clean
+    - cutoff: Only delete files with an mtime older than this POSIX timestamp (None deletes all files)
+    """
+    try:
+        entries = os.scandir(directory)
+    except FileNotFoundError:
+        return
+    with entries:
+        for entry in entries:
             try:
-                f.unlink()
-                io_manager.write_debug(f"Deleted old file: {f.name}")
-            except Exception as e:
-                io_manager.write_error(f"Could not delete {f.name}: {e}")
\ No newline at end of file
+                if not entry.is_file():
+                    continue
+                if cutoff is not None and entry.stat().st_mtime >= cutoff:
+                    continue
+                os.unlink(entry.path)
+                io_manager.write_debug(f"Deleted old file: {entry.name}")
+            except OSError as e:
+                io_manager.write_error(f"Could not delete {entry.name}: {e}")
+
+def clean_multiple(folders, max_age_minutes=60, wipe_temp_dir=True):
+    """
+    Remove old files from several folders (and optionally wipe TEMP_DIR) concurrently
+    Inputs:
+    - folders: list of folders to clean
+    - max_age_minutes: Files older than this are deleted
+    - wipe_temp_dir: Also delete every file in TEMP_DIR
+    """
+    cutoff = datetime.now().timestamp() - (max_age_minutes * 60)
+    jobs = [(folder, cutoff) for folder in folders]
+    if wipe_temp_dir:
+        jobs.append((TEMP_DIR, None))
+    if not jobs:
+        return
+    with ThreadPoolExecutor(max_workers=len(jobs)) as executor:
+        list(executor.map(lambda job: _clean_dir(*job), jobs))
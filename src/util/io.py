@@ -1,14 +1,23 @@
 from datetime import datetime, timezone
 import argparse
 import sys
+import time
 
 class TimestampedOutput:
     def __init__(self, stream):
         self.stream = stream
+        # Date/time part of the timestamp, reformatted only when the second changes
+        self._last_sec = None
+        self._last_prefix = ""
 
     def write(self, message):
         if message.strip():  # skip empty lines
-            timestamp = datetime.now(timezone.utc).isoformat()
+            now = time.time()
+            sec = int(now)
+            if sec != self._last_sec:
+                self._last_sec = sec
+                self._last_prefix = datetime.fromtimestamp(sec, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+            timestamp = f"{self._last_prefix}.{int((now - sec) * 1e6):06d}+00:00"
             self.stream.write(f"[{timestamp}] {message}")
         else:
             self.stream.write(message)
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Modules import as `EdgeWARN.*` and `util.*` from src/, like run.py does
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
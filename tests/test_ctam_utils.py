@@ -0,0 +1,53 @@
+import math
+from datetime import datetime
+
+import pytest
+
+import util.file as fs
+from EdgeWARN.ctam.utils import DataHandler, DataLoader
+
+
+def _cells():
+    return [
+        {"id": 1, "storm_history": [{"timestamp": "2025-06-01T12:00:00", "VIL": 10.0},
+                                    {"timestamp": "2025-06-01T12:02:00", "VIL": 12.0}]},
+        {"id": 2, "storm_history": [{"VIL": 5.0}]},                         # no timestamp
+        {"id": 3, "storm_history": [{"timestamp": "not-a-time", "VIL": 1.0}]},
+    ]
+
+
+def test_bad_timestamp_only_fails_its_own_cell():
+    handler = DataHandler(_cells())
+    with pytest.raises(KeyError):
+        handler.find_latest_hist_key(2, "VIL")
+    with pytest.raises(ValueError):
+        handler.find_latest_hist_key(3, "VIL")
+
+    assert handler.find_latest_hist_key(1, "VIL") == [
+        (10.0, datetime(2025, 6, 1, 12, 0)),
+        (12.0, datetime(2025, 6, 1, 12, 2)),
+    ]
+
+
+def test_replacing_stormcells_clears_memo():
+    handler = DataHandler(_cells())
+    assert handler.find_latest_hist_key("1", "VIL")[-1][0] == 12.0
+
+    updated = _cells()
+    updated[0]["storm_history"][-1]["VIL"] = 20.0
+    handler.stormcells = updated
+    assert handler.find_latest_hist_key(1, "VIL")[-1][0] == 20.0
+
+
+def test_returned_list_is_a_copy():
+    handler = DataHandler(_cells())
+    handler.find_latest_hist_key(1, "VIL").clear()
+    assert len(handler.find_latest_hist_key(1, "VIL")) == 2
+
+
+def test_load_json_keeps_nan(tmp_path):
+    path = tmp_path / "stormcell_test.json"
+    fs.write_json([{"id": 1, "centroid": (float("nan"), float("nan"))}], path)
+
+    cells = DataLoader.load_json(path)
+    assert all(math.isnan(v) for v in cells[0]["centroid"])
@@ -0,0 +1,25 @@
+import math
+
+import util.file as fs
+from EdgeWARN.core.process.detect import detect
+from util.io import IOManager
+
+
+def test_cache_hit_keeps_nan(tmp_path, monkeypatch):
+    monkeypatch.setattr(fs, "DETECT_CACHE_DIR", tmp_path / "cache")
+    inputs = []
+    for name in ("radar.grib2", "ps.json", "pt.grib2"):
+        path = tmp_path / name
+        path.write_text("")
+        inputs.append(path)
+    bounds = (35.0, 38.0, 283.0, 285.0)
+
+    cache_path = detect._detect_cache_path(*inputs, *bounds)
+    cache_path.parent.mkdir(parents=True)
+    entries = [{"id": 1, "centroid": (float("nan"), float("nan")), "max_refl": float("nan"), "storm_history": []}]
+    fs.write_json({"entries": entries, "probsevere": {"features": []}}, cache_path, indent=None)
+
+    cached, ps_ds = detect.detect_cells(*inputs, IOManager("[Test]"), *bounds)
+    assert all(math.isnan(v) for v in cached[0]["centroid"])
+    assert math.isnan(cached[0]["max_refl"])
+    assert ps_ds == {"features": []}
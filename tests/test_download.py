@@ -0,0 +1,45 @@
+import datetime
+
+from EdgeWARN.core.ingest import download
+from EdgeWARN.core.ingest.download import FileFinder
+from util.io import IOManager
+
+
+def _utc(*args):
+    return datetime.datetime(*args, tzinfo=datetime.timezone.utc)
+
+
+def test_dash_timestamp_takes_priority_over_underscore():
+    name = "rap_20250601_110000_MRMS_20250601-120230.grib2"
+    assert FileFinder.extract_timestamp_from_filename(name) == _utc(2025, 6, 1, 12, 2)
+
+
+def test_unparseable_match_falls_through_to_next_pattern():
+    # 99th month can't parse as a '-' stamp; the '_' stamp is used instead
+    name = "x_20259901-120000_20250601_130500.nc"
+    assert FileFinder.extract_timestamp_from_filename(name) == _utc(2025, 6, 1, 13, 5)
+
+
+def test_goes_start_time_needs_tenths_digit():
+    name = "OR_GLM-L2-LCFA_G16_s20251521201000_e20251521201200.nc"
+    assert FileFinder.extract_timestamp_from_filename(name) == _utc(2025, 6, 1, 12, 1)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    fallback = FileFinder.extract_timestamp_from_filename("s2025152120100")
+    assert abs((fallback - now).total_seconds()) < 120
+
+
+class _Response:
+    def __init__(self, content):
+        self.status_code = 200
+        self.content = content
+        self.headers = {}
+
+    def raise_for_status(self):
+        pass
+
+
+def test_blank_listing_is_empty(monkeypatch):
+    for n, body in enumerate((b"", b"  \n", b"<!-- nothing here -->")):
+        monkeypatch.setattr(download._SESSION, "get", lambda url, headers=None, body=body: _Response(body))
+        finder = FileFinder(datetime.datetime.now(datetime.timezone.utc), f"https://example.invalid/{n}/", 60, 10, IOManager("[Test]"))
+        assert finder.list_http_directory(finder.base_url, verbose=False) == []
@@ -0,0 +1,62 @@
+import math
+
+import numpy as np
+
+import util.file as fs
+from EdgeWARN.core.process.detect.tools.vecmath import StormVectorCalculator
+
+
+def _cell(centroid, max_refl):
+    return {
+        "id": np.int64(7),
+        "num_gates": 12,
+        "centroid": centroid,
+        "bbox": [(np.float32(35.5), np.float64(280.25))],
+        "max_refl": max_refl,
+        "storm_history": [
+            {"id": 7, "timestamp": "2025-06-01T12:00:00", "max_refl": 50.0, "num_gates": 10, "centroid": (35.0, 280.0)},
+            {"id": 7, "timestamp": "2025-06-01T12:02:00", "max_refl": max_refl, "num_gates": 12, "centroid": centroid},
+        ],
+    }
+
+
+def test_nan_centroid_survives_round_trip(tmp_path):
+    path = tmp_path / "stormcell_test.json"
+    fs.write_json([_cell((np.nan, np.nan), float("nan"))], path)
+
+    cell = fs.read_json(path)[0]
+    latest = cell["storm_history"][-1]
+    assert all(math.isnan(v) for v in cell["centroid"])
+    assert all(math.isnan(v) for v in latest["centroid"])
+    assert math.isnan(cell["max_refl"]) and math.isnan(latest["max_refl"])
+
+    # NumPy scalars are written as numbers, not strings
+    assert cell["id"] == 7
+    assert cell["bbox"] == [[35.5, 280.25]]
+
+    # Reloaded cells still go through the motion vectors; NaN propagates instead of raising
+    latest = StormVectorCalculator.calculate_vectors([cell])[0]["storm_history"][-1]
+    assert math.isnan(latest["dx"]) and math.isnan(latest["dy"])
+    assert latest["dt"] == 120.0
+
+
+def test_finite_values_round_trip(tmp_path):
+    path = tmp_path / "stormcell_test.json"
+    fs.write_json([_cell((35.25, 280.5), 55.5)], path)
+
+    cell = fs.read_json(path)[0]
+    assert cell["centroid"] == [35.25, 280.5]
+    assert cell["max_refl"] == 55.5
+
+
+def test_integration_write_json_keeps_nan(tmp_path):
+    from EdgeWARN.core.process.integrate.utils import StatFileHandler
+    from util.io import IOManager
+
+    path = tmp_path / "stormcell_test.json"
+    handler = StatFileHandler(IOManager("[Test]"))
+    handler.write_json([_cell((np.nan, np.nan), float("nan"))], path)
+
+    cell = handler.load_json(path)[0]
+    assert all(math.isnan(v) for v in cell["storm_history"][-1]["centroid"])
+    assert all(math.isnan(v) for v in fs.read_json(path)[0]["centroid"])
@@ -0,0 +1,42 @@
+import math
+
+import numpy as np
+import xarray as xr
+
+from EdgeWARN.core.process.detect.tools.gatemapper import GateMapper
+from EdgeWARN.core.process.detect.tools.save import CellDataSaver
+
+
+def _saver(bboxes, polygon_grid, refl):
+    lats = np.array([35.0, 35.1, 35.2])
+    lons = np.array([-80.0, -79.9, -79.8])
+    radar_ds = xr.Dataset(
+        {"unknown": (("latitude", "longitude"), refl)},
+        coords={"latitude": lats, "longitude": lons},
+    )
+    mapped_ds = GateMapper._polygon_dataset(polygon_grid, lats, lons)
+    preciptype_ds = xr.Dataset({"unknown": (("latitude", "longitude"), np.zeros_like(refl))})
+    return CellDataSaver(bboxes, radar_ds, mapped_ds, mapped_ds, None, preciptype_ds)
+
+
+def test_create_entry_without_polygons():
+    grid = np.zeros((3, 3), dtype=np.int64)
+    assert _saver({}, grid, np.full((3, 3), 30.0)).create_entry() == []
+    assert _saver({0: []}, grid, np.full((3, 3), 30.0)).create_entry() == []
+
+
+def test_create_entry_weighted_centroid():
+    grid = np.array([[5, 5, 0], [0, 0, 0], [0, 7, 7]])
+    refl = np.array([[40.0, 40.0, 10.0], [10.0, 10.0, 10.0], [10.0, np.nan, np.nan]])
+    entries = {e["id"]: e for e in _saver({5: [], 7: []}, grid, refl).create_entry()}
+
+    assert entries[5]["num_gates"] == 2
+    assert entries[5]["max_refl"] == 40.0
+    lat, lon = entries[5]["centroid"]
+    assert math.isclose(lat, 35.0)
+    assert math.isclose(lon, (-79.95) % 360)
+
+    # Polygon with no valid reflectivity keeps its gates but gets NaN stats
+    assert entries[7]["num_gates"] == 2
+    assert math.isnan(entries[7]["max_refl"])
+    assert all(math.isnan(v) for v in entries[7]["centroid"])